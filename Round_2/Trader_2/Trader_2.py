@@ -4,6 +4,79 @@ import json
 import math
 import statistics
 import random
+from collections import defaultdict
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+    NUMBA_AVAILABLE = False
+
+# Integer codes for market regimes so the numeric kernels avoid string comparisons
+REGIME_CODES = {
+    "normal": 0,
+    "volatile": 1,
+    "trending": 2,
+    "mean_reverting": 3
+}
+
+@njit
+def _compute_mm(fair_value, half_spread, trend, position, effective_limit, regime_code, in_drawdown, aggressive_edge, min_spread):
+    """Market making prices and sizes. Returns (bid_price, ask_price, buy_size, sell_size)."""
+    # Adjust aggressiveness based on market regime
+    if regime_code == 1:
+        aggressive_edge *= 0.8  # Less aggressive in volatile markets (up from 0.7)
+    elif regime_code == 2:
+        aggressive_edge *= 1.3  # More aggressive in trending markets (up from 1.2)
+    elif regime_code == 3:
+        aggressive_edge *= 1.1  # Slightly more aggressive in mean reverting markets
+    
+    # Apply asymmetric spreads based on our position and trend
+    position_bias = -position / effective_limit if effective_limit > 0 else 0.0
+    
+    # Combine trend and position bias for dynamic spread adjustment
+    bias_factor = (trend * 0.3) + (position_bias * 0.7)
+    bias_adjustment = half_spread * bias_factor * 0.5  # Reduced impact from 0.6
+    
+    # Calculate bid and ask prices with bias adjustment (floor / ceil via floor division)
+    bid_price = int((fair_value - half_spread + bias_adjustment) // 1)
+    ask_price = -int(-(fair_value + half_spread + bias_adjustment) // 1)
+    
+    # Ensure spread doesn't get too tight - prices are whole ticks, so widen each side by ceil(gap / 2)
+    if ask_price - bid_price < min_spread:
+        spread_adjustment = -int(-(min_spread - (ask_price - bid_price)) // 2)
+        bid_price -= spread_adjustment
+        ask_price += spread_adjustment
+    
+    # Calculate appropriate order sizes
+    remaining_buy = effective_limit - position
+    remaining_sell = effective_limit + position
+    
+    # Dynamic sizing based on position, market regime, and drawdown state
+    base_size = max(1, int(effective_limit * 0.1))  # Base size at 10% of position limit
+    
+    # Adjust size based on regime
+    if regime_code == 1:
+        base_size = max(1, int(base_size * 0.8))  # Reduced size in volatile markets (up from 0.7)
+    elif regime_code == 2:
+        base_size = max(1, int(base_size * 1.3))  # Increased size in trending markets (up from 1.2)
+    
+    # Further reduce size if in drawdown
+    if in_drawdown:
+        base_size = max(1, int(base_size * 0.7))  # Reduced from 0.6
+        
+    # Calculate final sizes with asymmetric sizing based on position
+    buy_size = min(remaining_buy, -int(-(base_size * (1 + aggressive_edge * (1 - position_bias))) // 1))
+    sell_size = min(remaining_sell, -int(-(base_size * (1 + aggressive_edge * (1 + position_bias))) // 1))
+    
+    return bid_price, ask_price, buy_size, sell_size
+
+if NUMBA_AVAILABLE:
+    _compute_mm(10000.0, 1.0, 0.0, 0, 50, 0, False, 0.5, 2)
 
 class Trader:
     # Position limits for each product
@@ -138,6 +211,30 @@ class Trader:
         self.fair_values = {}     # Track fair values across products
         self.arbitrage_executed = {} # Track arbitrage opportunities executed
         
+        # Basket compositions as (component, quantity) tuples for fast iteration.
+        # Zero-quantity legs are dropped: they add no value and would divide by zero in the limit checks.
+        self._basket_comp_tuples = {
+            basket_name: tuple((component, quantity) for component, quantity in composition.items() if quantity)
+            for basket_name, composition in self.BASKET_COMPOSITION.items()
+        }
+        # Static (component, quantity, position_limit) rows for the arbitrage limit checks
+        self._basket_comp_limits = {
+            basket_name: tuple((component, quantity, self.get_position_limit(component)) for component, quantity in comp_tuple)
+            for basket_name, comp_tuple in self._basket_comp_tuples.items()
+        }
+        
+    def build_book_views(self, order_depths):
+        """Sort every order book once per tick: bids highest first, asks lowest first.
+        
+        Ask volumes are flipped to positive here so callers never need abs().
+        """
+        book_views = {}
+        for product, order_depth in order_depths.items():
+            sorted_bids = sorted(order_depth.buy_orders.items(), reverse=True)
+            sorted_asks = sorted((price, -volume) for price, volume in order_depth.sell_orders.items())
+            book_views[product] = (sorted_bids, sorted_asks)
+        return book_views
+        
     def get_position_limit(self, product):
         """Gets the position limit for a given product."""
         return self.POSITION_LIMITS.get(product, self.POSITION_LIMITS["DEFAULT"])
@@ -221,23 +318,18 @@ class Trader:
         if "volatility" not in trader_data:
             trader_data["volatility"] = {}
         
-        # Initialize price history if needed
-        if product not in trader_data["price_history"]:
-            trader_data["price_history"][product] = []
-        
-        # Add current price to history
-        trader_data["price_history"][product].append(mid_price)
-        
-        # Keep only the most recent prices
-        if len(trader_data["price_history"][product]) > history_len:
-            trader_data["price_history"][product] = trader_data["price_history"][product][-history_len:]
+        # Fixed-size window, trimmed in place rather than re-sliced into a new list
+        prices = trader_data["price_history"].setdefault(product, [])
+        prices.append(mid_price)
+        if len(prices) > history_len:
+            del prices[:-history_len]
         
         # Calculate volatility if we have enough data points
-        if len(trader_data["price_history"][product]) >= 3:
+        if len(prices) >= 3:
             # Calculate price changes as percentage
             price_changes = [
-                abs((trader_data["price_history"][product][i] / trader_data["price_history"][product][i-1]) - 1) 
-                for i in range(1, len(trader_data["price_history"][product]))
+                abs((prices[i] / prices[i-1]) - 1) 
+                for i in range(1, len(prices))
             ]
             
             # Volatility as standard deviation of price changes
@@ -415,7 +507,7 @@ class Trader:
             # For sell orders, we take if the price is above fair value + take width
             return price >= fair_value + adjusted_take_width
             
-    def take_best_orders(self, product, fair_value, orders, order_depth, position, params, regime, volatility, in_drawdown):
+    def take_best_orders(self, product, fair_value, orders, book_view, position, params, regime, volatility, in_drawdown):
         """Take favorable orders from the market with improved selectivity."""
         take_width = params["take_width"]
         position_limit = self.get_position_limit(product)
@@ -430,15 +522,13 @@ class Trader:
         
         buy_order_volume = 0
         sell_order_volume = 0
+        sorted_bids, sorted_asks = book_view
+        make_order = Order
         
         # Check for profitable sell orders (we buy)
-        if len(order_depth.sell_orders) != 0:
-            # Sort sell orders by price, cheapest first
-            sell_prices = sorted(order_depth.sell_orders.keys())
-            
-            for price in sell_prices:
-                amount = abs(order_depth.sell_orders[price])
-                
+        if sorted_asks:
+            # Sell orders are already sorted by price, cheapest first
+            for price, amount in sorted_asks:
                 # Check if this order is worth taking
                 if self.should_take_order(product, price, fair_value, take_width, True, regime, volatility):
                     # Calculate how much we can buy based on position limits
@@ -446,7 +536,7 @@ class Trader:
                     quantity = min(amount, max_buy)
                     
                     if quantity > 0:
-                        orders.append(Order(product, price, quantity))
+                        orders.append(make_order(product, price, quantity))
                         buy_order_volume += quantity
                         
                         # If we're fully invested, stop looking at more orders
@@ -457,12 +547,9 @@ class Trader:
                     break
         
         # Check for profitable buy orders (we sell)
-        if len(order_depth.buy_orders) != 0:
-            # Sort buy orders by price, highest first
-            buy_prices = sorted(order_depth.buy_orders.keys(), reverse=True)
-            
-            for price in buy_prices:
-                amount = order_depth.buy_orders[price]
+        if sorted_bids:
+            # Buy orders are already sorted by price, highest first
+            for price, amount in sorted_bids:
                 
                 # Check if this order is worth taking
                 if self.should_take_order(product, price, fair_value, take_width, False, regime, volatility):
@@ -471,7 +558,7 @@ class Trader:
                     quantity = min(amount, max_sell)
                     
                     if quantity > 0:
-                        orders.append(Order(product, price, -quantity))
+                        orders.append(make_order(product, price, -quantity))
                         sell_order_volume += quantity
                         
                         # If we've reached our sell limit, stop looking at more orders
@@ -603,80 +690,40 @@ class Trader:
         # Further adjust by the product's max position scale parameter
         effective_limit = math.floor(effective_limit * params["max_position_scale"])
         
-        # Adjust aggressiveness based on market regime
-        if regime == "volatile":
-            aggressive_edge *= 0.8  # Less aggressive in volatile markets (up from 0.7)
-        elif regime == "trending":
-            aggressive_edge *= 1.3  # More aggressive in trending markets (up from 1.2)
-        elif regime == "mean_reverting":
-            aggressive_edge *= 1.1  # Slightly more aggressive in mean reverting markets
-        
-        # Calculate appropriate bid and ask prices
-        half_spread = spread / 2
-        
-        # Apply asymmetric spreads based on our position and trend
-        trend = trader_data["market_trend"].get(product, 0)
-        position_bias = -position / effective_limit if effective_limit > 0 else 0
-        
-        # Combine trend and position bias for dynamic spread adjustment
-        bias_factor = (trend * 0.3) + (position_bias * 0.7)
-        bias_adjustment = half_spread * bias_factor * 0.5  # Reduced impact from 0.6
-        
-        # Calculate bid and ask prices with bias adjustment
-        bid_price = math.floor(fair_value - half_spread + bias_adjustment)
-        ask_price = math.ceil(fair_value + half_spread + bias_adjustment)
-        
-        # Ensure spread doesn't get too tight
-        if ask_price - bid_price < params["min_spread"]:
-            spread_adjustment = (params["min_spread"] - (ask_price - bid_price)) / 2
-            bid_price = math.floor(bid_price - spread_adjustment)
-            ask_price = math.ceil(ask_price + spread_adjustment)
-        
-        # Calculate appropriate order sizes
-        remaining_buy = effective_limit - position
-        remaining_sell = effective_limit + position
-        
-        # Dynamic sizing based on position, market regime, and drawdown state
-        base_size = max(1, int(effective_limit * 0.1))  # Base size at 10% of position limit
-        
-        # Adjust size based on regime
-        if regime == "volatile":
-            base_size = max(1, int(base_size * 0.8))  # Reduced size in volatile markets (up from 0.7)
-        elif regime == "trending":
-            base_size = max(1, int(base_size * 1.3))  # Increased size in trending markets (up from 1.2)
-        
-        # Further reduce size if in drawdown
-        if in_drawdown:
-            base_size = max(1, int(base_size * 0.7))  # Reduced from 0.6
-            
-        # Calculate final sizes with asymmetric sizing based on position
-        buy_size = min(remaining_buy, math.ceil(base_size * (1 + aggressive_edge * (1 - position_bias))))
-        sell_size = min(remaining_sell, math.ceil(base_size * (1 + aggressive_edge * (1 + position_bias))))
+        # Prices and sizes come from the compiled kernel
+        bid_price, ask_price, buy_size, sell_size = _compute_mm(
+            fair_value, spread / 2, trader_data["market_trend"].get(product, 0), position,
+            effective_limit, REGIME_CODES.get(regime, 0), in_drawdown, aggressive_edge, params["min_spread"]
+        )
         
-        # Place the orders
-        if buy_size > 0:
+        # Place both quotes in a single extend
+        if buy_size > 0 and sell_size > 0:
+            orders.extend((Order(product, bid_price, buy_size), Order(product, ask_price, -sell_size)))
+        elif buy_size > 0:
             orders.append(Order(product, bid_price, buy_size))
-        if sell_size > 0:
+        elif sell_size > 0:
             orders.append(Order(product, ask_price, -sell_size))
             
         return orders
     
-    def manage_basket_arbitrage(self, products, inventory, trader_data, order_depths, orders):
+    def manage_basket_arbitrage(self, products, inventory, trader_data, book_views, orders):
         """Look for and execute basket arbitrage opportunities."""
-        # Initialize needed data structures
-        if "fair_values" not in trader_data:
-            trader_data["fair_values"] = {}
-        if "arbitrage_executed" not in trader_data:
-            trader_data["arbitrage_executed"] = {}
+        # Initialize needed data structures and bind them to locals
+        fair_values = trader_data.setdefault("fair_values", {})
+        arb_exec = trader_data.setdefault("arbitrage_executed", {})
+        make_order = Order  # Local binding avoids a global lookup per emitted order
+        min_profit = self.ARBITRAGE_PARAMS["min_profit_per_lot"]
+        max_lots = self.ARBITRAGE_PARAMS["max_arbitrage_lots"]
+        basket_discount = self.ARBITRAGE_PARAMS["basket_discount"]
             
         # Check if we have all necessary basket components and basket itself in the market
-        for basket_name, composition in self.BASKET_COMPOSITION.items():
+        for basket_name, comp_tuple in self._basket_comp_tuples.items():
             # Skip if basket or any component is not in current products
             if basket_name not in products:
                 continue
                 
             all_components_available = True
-            for component in composition:
+            for component, _ in comp_tuple:
                 if component not in products:
                     all_components_available = False
                     break
@@ -684,137 +731,139 @@ class Trader:
             if not all_components_available:
                 continue
                 
-            # Check for arbitrage opportunities
-            basket_position = inventory.get(basket_name, 0)
-            basket_position_limit = self.get_position_limit(basket_name)
-            
             # Get basket price
-            basket_depth = order_depths.get(basket_name, None)
-            if not basket_depth:
-                continue
+            basket_bids, basket_asks = book_views[basket_name]
+            
+            # Cheap pre-filter: when every component has a fair value, the basket value is known
+            # without touching the component books, so skip the basket if neither side has an edge
+            if all(component in fair_values for component, _ in comp_tuple):
+                rough_value = sum(fair_values[component] * quantity for component, quantity in comp_tuple) * basket_discount
+                if (not basket_asks or rough_value - basket_asks[0][0] < min_profit) and \
+                   (not basket_bids or basket_bids[0][0] - rough_value < min_profit):
+                    continue
                 
-            # Check component fair values and current positions
+            # Check component fair values and cache each component's top of book
             component_value = 0
             component_limits_ok = True
-            component_positions = {}
+            comp_book = {}
             
-            for component, quantity in composition.items():
-                component_position = inventory.get(component, 0)
-                component_limit = self.get_position_limit(component)
-                component_positions[component] = component_position
+            for component, quantity in comp_tuple:
+                component_bids, component_asks = book_views[component]
+                component_bid = component_bids[0][0] if component_bids else None
+                component_ask = component_asks[0][0] if component_asks else None
+                comp_book[component] = (component_bid, component_ask)
                 
                 # Calculate component value using fair value as a reference
-                if component in trader_data["fair_values"]:
-                    component_value += trader_data["fair_values"][component] * quantity
+                if component in fair_values:
+                    component_value += fair_values[component] * quantity
                 else:
                     # If no fair value, use mid price from order book
-                    component_depth = order_depths.get(component, None)
-                    if not component_depth or not component_depth.buy_orders or not component_depth.sell_orders:
+                    if component_bid is None or component_ask is None:
                         component_limits_ok = False
                         break
                         
-                    component_mid = (max(component_depth.buy_orders.keys()) + min(component_depth.sell_orders.keys())) / 2
+                    component_mid = (component_bid + component_ask) / 2
                     component_value += component_mid * quantity
             
             if not component_limits_ok:
                 continue
                 
             # Apply basket discount - baskets should be cheaper than components
-            expected_basket_value = component_value * self.ARBITRAGE_PARAMS["basket_discount"]
+            expected_basket_value = component_value * basket_discount
             
             # Check both arbitrage directions:
             # 1. Buy basket, sell components
             # 2. Buy components, sell basket
+            buy_basket_ok = bool(basket_asks) and expected_basket_value - basket_asks[0][0] >= min_profit
+            sell_basket_ok = bool(basket_bids) and basket_bids[0][0] - expected_basket_value >= min_profit
+            
+            # Most ticks have no edge in either direction - skip the limit scans entirely
+            if not buy_basket_ok and not sell_basket_ok:
+                continue
+            
+            # Check for arbitrage opportunities
+            basket_position = inventory.get(basket_name, 0)
+            basket_position_limit = self.get_position_limit(basket_name)
+            
+            comp_limits = self._basket_comp_limits[basket_name]
             
             # Initialize tracking for executed arbitrage
-            if basket_name not in trader_data["arbitrage_executed"]:
-                trader_data["arbitrage_executed"][basket_name] = {
-                    "buy_basket_sell_components": 0,
-                    "buy_components_sell_basket": 0
-                }
+            arb_basket = arb_exec.setdefault(basket_name, {
+                "buy_basket_sell_components": 0,
+                "buy_components_sell_basket": 0
+            })
             
             # Direction 1: Buy basket, sell components
-            if basket_depth.sell_orders:
+            if buy_basket_ok:
                 # Get best basket ask price
-                basket_ask = min(basket_depth.sell_orders.keys())
-                basket_ask_volume = abs(basket_depth.sell_orders[basket_ask])
+                basket_ask, basket_ask_volume = basket_asks[0]
+                
+                # Check position limits
+                max_baskets = min(
+                    basket_ask_volume,
+                    max_lots,
+                    basket_position_limit - basket_position
+                )
                 
-                # Calculate profit for this direction
-                potential_profit = expected_basket_value - basket_ask
+                # Check component position limits
+                max_baskets = min(max_baskets, min(
+                    (component_limit - inventory.get(component, 0)) // quantity
+                    for component, quantity, component_limit in comp_limits
+                ))
                 
-                if potential_profit >= self.ARBITRAGE_PARAMS["min_profit_per_lot"]:
-                    # Check position limits
-                    max_baskets = min(
-                        basket_ask_volume,
-                        self.ARBITRAGE_PARAMS["max_arbitrage_lots"],
-                        basket_position_limit - basket_position
-                    )
+                # Execute arbitrage if profitable and within limits
+                if max_baskets > 0:
+                    # Buy basket
+                    new_orders = [make_order(basket_name, basket_ask, max_baskets)]
+                    neg_baskets = -max_baskets
                     
-                    # Check component position limits
-                    for component, quantity in composition.items():
-                        component_position = component_positions[component]
-                        component_limit = self.get_position_limit(component)
-                        max_component_lots = (component_limit - component_position) // quantity
-                        max_baskets = min(max_baskets, max_component_lots)
+                    # Sell components
+                    for component, quantity in comp_tuple:
+                        # Find best bid price for component
+                        component_bid = comp_book[component][0]
+                        if component_bid is not None:
+                            # Sell the components at market
+                            new_orders.append(make_order(component, component_bid, neg_baskets * quantity))
+                    orders.extend(new_orders)
+                            
+                    # Update tracking
+                    arb_basket["buy_basket_sell_components"] += max_baskets
                     
-                    # Execute arbitrage if profitable and within limits
-                    if max_baskets > 0:
-                        # Buy basket
-                        orders.append(Order(basket_name, basket_ask, max_baskets))
-                        
-                        # Sell components
-                        for component, quantity in composition.items():
-                            # Find best bid price for component
-                            component_depth = order_depths.get(component)
-                            if component_depth and component_depth.buy_orders:
-                                component_bid = max(component_depth.buy_orders.keys())
-                                # Sell the components at market
-                                orders.append(Order(component, component_bid, -max_baskets * quantity))
-                                
-                        # Update tracking
-                        trader_data["arbitrage_executed"][basket_name]["buy_basket_sell_components"] += max_baskets
-                        
             # Direction 2: Buy components, sell basket
-            if basket_depth.buy_orders:
+            if sell_basket_ok:
                 # Get best basket bid price
-                basket_bid = max(basket_depth.buy_orders.keys())
-                basket_bid_volume = basket_depth.buy_orders[basket_bid]
+                basket_bid, basket_bid_volume = basket_bids[0]
                 
-                # Calculate profit for this direction
-                potential_profit = basket_bid - expected_basket_value
+                # Check position limits
+                max_baskets = min(
+                    basket_bid_volume,
+                    max_lots,
+                    basket_position_limit + basket_position
+                )
                 
-                if potential_profit >= self.ARBITRAGE_PARAMS["min_profit_per_lot"]:
-                    # Check position limits
-                    max_baskets = min(
-                        basket_bid_volume,
-                        self.ARBITRAGE_PARAMS["max_arbitrage_lots"],
-                        basket_position_limit + basket_position
-                    )
-                    
-                    # Check component position limits
-                    for component, quantity in composition.items():
-                        component_position = component_positions[component]
-                        component_limit = self.get_position_limit(component)
-                        max_component_lots = (component_position + component_limit) // quantity
-                        max_baskets = min(max_baskets, max_component_lots)
+                # Check component position limits
+                max_baskets = min(max_baskets, min(
+                    (inventory.get(component, 0) + component_limit) // quantity
+                    for component, quantity, component_limit in comp_limits
+                ))
+                
+                # Execute arbitrage if profitable and within limits
+                if max_baskets > 0:
+                    # Sell basket
+                    new_orders = [make_order(basket_name, basket_bid, -max_baskets)]
                     
-                    # Execute arbitrage if profitable and within limits
-                    if max_baskets > 0:
-                        # Sell basket
-                        orders.append(Order(basket_name, basket_bid, -max_baskets))
-                        
-                        # Buy components
-                        for component, quantity in composition.items():
-                            # Find best ask price for component
-                            component_depth = order_depths.get(component)
-                            if component_depth and component_depth.sell_orders:
-                                component_ask = min(component_depth.sell_orders.keys())
-                                # Buy the components at market
-                                orders.append(Order(component, component_ask, max_baskets * quantity))
-                                
-                        # Update tracking
-                        trader_data["arbitrage_executed"][basket_name]["buy_components_sell_basket"] += max_baskets
-        
+                    # Buy components
+                    for component, quantity in comp_tuple:
+                        # Find best ask price for component
+                        component_ask = comp_book[component][1]
+                        if component_ask is not None:
+                            # Buy the components at market
+                            new_orders.append(make_order(component, component_ask, max_baskets * quantity))
+                    orders.extend(new_orders)
+                            
+                    # Update tracking
+                    arb_basket["buy_components_sell_basket"] += max_baskets
+    
         return orders, trader_data
     
     def run(self, state: TradingState):
@@ -825,15 +874,16 @@ class Trader:
         except (json.JSONDecodeError, TypeError):
             trader_data = {}
             
-        result = {}
+        result = defaultdict(list)
+        
+        # Sort each order book once and share the views across all strategies
+        book_views = self.build_book_views(state.order_depths)
         
         # Initialize common data structures
-        if "current_position" not in trader_data:
-            trader_data["current_position"] = {}
+        current_position = trader_data.setdefault("current_position", {})
         
         # Track positions for all products
-        for product in state.position:
-            trader_data["current_position"][product] = state.position.get(product, 0)
+        current_position.update(state.position)
             
         # Look for arbitrage opportunities first
         if len(state.order_depths) > 1:  # Need at least 2 products for arbitrage
@@ -842,14 +892,12 @@ class Trader:
                 state.order_depths.keys(),
                 state.position,
                 trader_data,
-                state.order_depths,
+                book_views,
                 arbitrage_orders
             )
             
             # Add arbitrage orders to result by product
             for order in arbitrage_orders:
-                if order.symbol not in result:
-                    result[order.symbol] = []
                 result[order.symbol].append(order)
             
         # Process each product individually
@@ -858,26 +906,27 @@ class Trader:
             if product not in state.position:
                 continue
                 
-            order_depth = state.order_depths[product]
+            book_view = book_views[product]
+            sorted_bids, sorted_asks = book_view
             position = state.position.get(product, 0)
             
             # Skip empty order books
-            if not order_depth.buy_orders and not order_depth.sell_orders:
+            if not sorted_bids and not sorted_asks:
                 continue
                 
             # Calculate mid price
-            if len(order_depth.sell_orders) > 0 and len(order_depth.buy_orders) > 0:
-                best_bid = max(order_depth.buy_orders.keys())
-                best_ask = min(order_depth.sell_orders.keys())
+            if sorted_asks and sorted_bids:
+                best_bid = sorted_bids[0][0]
+                best_ask = sorted_asks[0][0]
                 
                 if best_bid >= best_ask:  # Check for crossed/invalid book
                     continue
                     
                 mid_price = (best_bid + best_ask) / 2
-            elif len(order_depth.sell_orders) > 0:
-                mid_price = min(order_depth.sell_orders.keys())
+            elif sorted_asks:
+                mid_price = sorted_asks[0][0]
             else:
-                mid_price = max(order_depth.buy_orders.keys())
+                mid_price = sorted_bids[0][0]
                 
             # Get product-specific parameters
             params = self.get_product_params(product)
@@ -899,13 +948,13 @@ class Trader:
             
             # Take favorable orders first (opportunistic trading)
             orders, buy_order_volume, sell_order_volume = self.take_best_orders(
-                product, fair_value, orders, order_depth, position, 
+                product, fair_value, orders, book_view, position, 
                 params, regime, volatility, in_drawdown
             )
             
             # Update position for spread calculation after taking orders
             adjusted_position = position + buy_order_volume - sell_order_volume
-            trader_data["current_position"][product] = adjusted_position
+            current_position[product] = adjusted_position
             
             # Calculate appropriate spread for market making
             spread = self.calculate_spread(product, fair_value, trader_data, params, regime, in_drawdown)
@@ -920,10 +969,10 @@ class Trader:
             if orders:
                 result[product] = orders
                 
-        # Serialize trader data for persistence
-        traderData = json.dumps(trader_data)
+        # Serialize trader data for persistence (compact separators keep the payload small)
+        traderData = json.dumps(trader_data, separators=(",", ":"))
         
         # No conversions in this implementation
         conversions = 0
         
-        return result, conversions, traderData
\ No newline at end of file
+        return dict(result), conversions, traderData
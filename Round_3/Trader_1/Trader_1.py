@@ -2,8 +2,104 @@ from datamodel import OrderDepth, TradingState, Order
 from typing import List, Dict
 import json
 import math
-import statistics
-import random
+from collections import defaultdict
+
+try:
+    from numba import njit
+    import numpy as np
+    NUMBA_AVAILABLE = True
+    
+    def _as_array(values):
+        return np.asarray(values, dtype=np.float64)
+except ImportError:
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+    NUMBA_AVAILABLE = False
+    
+    def _as_array(values):
+        return values
+
+@njit
+def _vol_stats_kernel(prices):
+    """Welford (count, mean, M2) of absolute tick-to-tick returns over the whole window."""
+    n = len(prices) - 1
+    mean = 0.0
+    m2 = 0.0
+    for i in range(1, len(prices)):
+        change = abs((prices[i] / prices[i-1]) - 1)
+        delta = change - mean
+        mean += delta / i
+        m2 += delta * (change - mean)
+    return n, mean, m2
+
+@njit
+def _trend_kernel(prices):
+    """Moving average crossover trend plus momentum. Needs at least 6 prices."""
+    n = len(prices)
+    short_ma = 0.0
+    for i in range(n - 3, n):
+        short_ma += prices[i]
+    short_ma /= 3
+    med_ma = 0.0
+    for i in range(n - 6, n):
+        med_ma += prices[i]
+    med_ma /= 6
+    long_ma = 0.0
+    for i in range(n):
+        long_ma += prices[i]
+    long_ma /= n
+    
+    if short_ma > med_ma and med_ma > long_ma:
+        current_trend = 1.5
+    elif short_ma > med_ma:
+        current_trend = 1.0
+    elif short_ma < med_ma and med_ma < long_ma:
+        current_trend = -1.5
+    elif short_ma < med_ma:
+        current_trend = -1.0
+    else:
+        current_trend = 0.0
+        
+    recent_change = (prices[n-1] - prices[n-4]) / prices[n-4]
+    if recent_change > 0:
+        current_trend += 0.5
+    elif recent_change < 0:
+        current_trend -= 0.5
+    return current_trend
+
+@njit
+def _regime_kernel(prices, current_price):
+    """Returns (consecutive_up, consecutive_down, trend_strength, price_deviation)."""
+    n = len(prices)
+    consecutive_up = 0
+    consecutive_down = 0
+    total = prices[0]
+    high = prices[0]
+    low = prices[0]
+    for i in range(1, n):
+        if prices[i] > prices[i-1]:
+            consecutive_up += 1
+            consecutive_down = 0
+        elif prices[i] < prices[i-1]:
+            consecutive_down += 1
+            consecutive_up = 0
+        total += prices[i]
+        high = max(high, prices[i])
+        low = min(low, prices[i])
+    
+    avg_price = total / n
+    price_deviation = abs(current_price - avg_price) / avg_price
+    trend_strength = abs(prices[n-1] - prices[0]) / (high - low + 0.001)
+    return consecutive_up, consecutive_down, trend_strength, price_deviation
+
+if NUMBA_AVAILABLE:
+    _warmup_prices = _as_array([1.0, 1.01, 1.02, 1.01, 1.03, 1.02])
+    _vol_stats_kernel(_warmup_prices)
+    _trend_kernel(_warmup_prices)
+    _regime_kernel(_warmup_prices, 1.0)
+    _regime_kernel(_warmup_prices, 1)
 
 class Trader:
     # Position limits for each product
@@ -22,6 +118,15 @@ class Trader:
         "DEFAULT": 20
     }
     
+    # Voucher names and strike prices for voucher-rock arbitrage
+    VOUCHER_STRIKES = (
+        ("VOLCANIC_ROCK_VOUCHER_9500", 9500),
+        ("VOLCANIC_ROCK_VOUCHER_9750", 9750),
+        ("VOLCANIC_ROCK_VOUCHER_10000", 10000),
+        ("VOLCANIC_ROCK_VOUCHER_10250", 10250),
+        ("VOLCANIC_ROCK_VOUCHER_10500", 10500)
+    )
+    
     # Basket compositions for arbitrage
     BASKET_COMPOSITION = {
         "PICNIC_BASKET1": {
@@ -35,6 +140,8 @@ class Trader:
             # "DJEMBES": 0
         }
     }
+    # manage_basket_arbitrage only trades when a basket or the rock is quoted
+    ARBITRAGE_TRIGGERS = frozenset(list(BASKET_COMPOSITION) + ["VOLCANIC_ROCK"])
     
     # Product-specific parameters
     PRODUCT_PARAMS = {
@@ -195,61 +302,83 @@ class Trader:
         "voucher_premium_factor": 1.1,  # Premium over intrinsic value for vouchers
     }
     
+    # Per-regime multipliers used by fair value, spread, take and quoting logic.
+    # alpha is clamped to [alpha_floor, alpha_cap]; min_spread becomes max(ms + add, ms * mul, floor).
+    REGIME_ADJUSTMENTS = {
+        "normal": {
+            "alpha_mul": 1.0, "alpha_cap": float("inf"), "alpha_floor": 0.0, "trend_mul": 1.0,
+            "spread_mul": 1.0, "min_spread_add": 0, "min_spread_mul": 1, "min_spread_floor": 0,
+            "take_mul": 1.0, "agg_mul": 1.0, "size_mul": 1.0,
+        },
+        "volatile": {
+            "alpha_mul": 1.5, "alpha_cap": 0.7, "alpha_floor": 0.0, "trend_mul": 1.0,
+            "spread_mul": 1.4, "min_spread_add": 1, "min_spread_mul": 1.4, "min_spread_floor": 0,
+            "take_mul": 1.4, "agg_mul": 0.8, "size_mul": 0.8,
+        },
+        "trending": {
+            "alpha_mul": 1.3, "alpha_cap": 0.6, "alpha_floor": 0.0, "trend_mul": 1.7,
+            "spread_mul": 0.8, "min_spread_add": -1, "min_spread_mul": 0, "min_spread_floor": 1,
+            "take_mul": 0.7, "agg_mul": 1.3, "size_mul": 1.3,
+        },
+        "mean_reverting": {
+            "alpha_mul": 0.7, "alpha_cap": float("inf"), "alpha_floor": 0.15, "trend_mul": 0.4,
+            "spread_mul": 1.1, "min_spread_add": 0, "min_spread_mul": 1, "min_spread_floor": 0,
+            "take_mul": 0.75, "agg_mul": 1.1, "size_mul": 1.0,
+        },
+    }
+    
     # Drawdown protection parameters
     DRAWDOWN_PROTECTION = {
         "window_size": 8,
         "threshold": 0.04,
         "reduction_factor": 0.6,
         "recovery_factor": 0.3,
+        "recovery_threshold": 0.5,  # Leave drawdown once the recovery score reaches this
     }
     
+    # Top-level traderData sections, created once per tick so the methods can index them directly
+    TRADER_SCHEMA = (
+        "market_regime", "price_history", "volatility", "ema_prices", "last_mid_prices",
+        "market_trend", "pnl_history", "position_history", "in_drawdown", "drawdown_counter",
+        "fair_values", "arbitrage_executed", "current_position", "vol_stats",
+    )
+    
     def __init__(self):
-        self.price_history = {}
-        self.volatility = {}
-        self.ema_prices = {}
-        self.last_mid_prices = {}
-        self.position_history = {}
-        self.market_trend = {}
-        self.pnl_history = {}
-        self.market_regime = {}
-        self.success_rate = {}
-        self.fair_values = {}
-        self.arbitrage_executed = {}
-        
-    def get_position_limit(self, product):
-        return self.POSITION_LIMITS.get(product, self.POSITION_LIMITS["DEFAULT"])
-        
-    def get_product_params(self, product):
-        return self.PRODUCT_PARAMS.get(product, self.DEFAULT_PARAMS)
+        # Memoized lookups - unknown products resolve to the defaults once and are then cached
+        self._limit_cache = defaultdict(lambda: self.POSITION_LIMITS["DEFAULT"], self.POSITION_LIMITS)
+        self._params_cache = defaultdict(lambda: self.DEFAULT_PARAMS, self.PRODUCT_PARAMS)
+        
+        # Basket legs as parallel (names, quantities, limits) tuples so the arbitrage loop zips instead of re-walking dicts
+        self._basket_soa = {}
+        for basket_name, composition in self.BASKET_COMPOSITION.items():
+            names = tuple(composition)
+            self._basket_soa[basket_name] = (
+                names,
+                tuple(composition[name] for name in names),
+                tuple(self._limit_cache[name] for name in names)
+            )
+        
+        # The dict behind the last traderData we returned, reused while the exchange hands that string back
+        self._trader_data = None
+        self._trader_data_json = None
+        
+    def get_effective_limit(self, position_limit, params, in_drawdown):
+        # Limits and scales are positive, so int() truncation is the same as math.floor
+        effective_limit = position_limit
+        if in_drawdown:
+            effective_limit = int(effective_limit * self.DRAWDOWN_PROTECTION["reduction_factor"])
+        return int(effective_limit * params["max_position_scale"])
     
     def detect_market_regime(self, product, trader_data, current_price):
-        if "market_regime" not in trader_data:
-            trader_data["market_regime"] = {}
-        if "price_history" not in trader_data:
-            trader_data["price_history"] = {}
-        if "volatility" not in trader_data:
-            trader_data["volatility"] = {}
-        
-        if product not in trader_data["price_history"] or len(trader_data["price_history"].get(product, [])) < 5:
-            trader_data["market_regime"][product] = "normal"
+        market_regime = trader_data["market_regime"]
+        history = trader_data["price_history"].get(product)
+        if history is None or len(history) < 5:
+            market_regime[product] = "normal"
             return "normal", trader_data
             
-        prices = trader_data["price_history"][product][-8:]
-        
-        consecutive_up = 0
-        consecutive_down = 0
-        for i in range(1, len(prices)):
-            if prices[i] > prices[i-1]:
-                consecutive_up += 1
-                consecutive_down = 0
-            elif prices[i] < prices[i-1]:
-                consecutive_down += 1
-                consecutive_up = 0
-        
+        prices = history[-8:]
+        consecutive_up, consecutive_down, trend_strength, price_deviation = _regime_kernel(_as_array(prices), current_price)
         recent_volatility = trader_data["volatility"].get(product, 0.01)
-        avg_price = sum(prices) / len(prices)
-        price_deviation = abs(current_price - avg_price) / avg_price
-        trend_strength = abs(prices[-1] - prices[0]) / (max(prices) - min(prices) + 0.001)
         
         if (consecutive_up >= 3 or consecutive_down >= 3) and trend_strength > 0.5:
             regime = "trending"
@@ -260,12 +389,12 @@ class Trader:
         else:
             regime = "normal"
             
-        old_regime = trader_data["market_regime"].get(product, "normal")
+        old_regime = market_regime.get(product, "normal")
         if old_regime != regime:
             if (regime == "volatile" and recent_volatility > 0.035) or \
                (regime == "trending" and (consecutive_up >= 3 or consecutive_down >= 3)) or \
                (regime == "mean_reverting" and price_deviation > 0.025):
-                trader_data["market_regime"][product] = regime
+                market_regime[product] = regime
             else:
                 regime = old_regime
         
@@ -273,64 +402,56 @@ class Trader:
     
     def calculate_volatility(self, product, mid_price, trader_data):
         history_len = 20
-        if "price_history" not in trader_data:
-            trader_data["price_history"] = {}
-        if "volatility" not in trader_data:
-            trader_data["volatility"] = {}
-        
-        if product not in trader_data["price_history"]:
-            trader_data["price_history"][product] = []
-        
-        trader_data["price_history"][product].append(mid_price)
-        if len(trader_data["price_history"][product]) > history_len:
-            trader_data["price_history"][product] = trader_data["price_history"][product][-history_len:]
-        
-        if len(trader_data["price_history"][product]) >= 3:
-            price_changes = [
-                abs((trader_data["price_history"][product][i] / trader_data["price_history"][product][i-1]) - 1) 
-                for i in range(1, len(trader_data["price_history"][product]))
-            ]
-            if len(price_changes) > 0:
-                volatility = statistics.stdev(price_changes) if len(price_changes) > 1 else price_changes[0]
-                old_volatility = trader_data["volatility"].get(product, volatility)
-                trader_data["volatility"][product] = 0.8 * old_volatility + 0.2 * volatility
-                return trader_data["volatility"][product]
-        
-        if product not in trader_data["volatility"]:
-            trader_data["volatility"][product] = 0.01
-        return trader_data["volatility"][product]
+        prices = trader_data["price_history"].setdefault(product, [])
+        volatilities = trader_data["volatility"]
+        
+        # Running [count, mean, M2, updates] of the window's absolute returns. Each tick adds the
+        # newest return and removes the evicted one; a full rescan every history_len updates
+        # keeps rounding drift from the removals from building up.
+        stats = trader_data["vol_stats"].get(product)
+        if stats is None or stats[3] >= history_len:
+            prices.append(mid_price)
+            if len(prices) > history_len:
+                del prices[:-history_len]
+            n, mean, m2 = _vol_stats_kernel(_as_array(prices)) if len(prices) >= 2 else (0, 0.0, 0.0)
+            stats = [n, mean, m2, 0]
+            trader_data["vol_stats"][product] = stats
+        else:
+            n, mean, m2 = stats[0], stats[1], stats[2]
+            # Bounded windows are trimmed in place so no new list is allocated per tick
+            prices.append(mid_price)
+            if len(prices) >= 2:
+                change = abs((prices[-1] / prices[-2]) - 1)
+                n += 1
+                delta = change - mean
+                mean += delta / n
+                m2 += delta * (change - mean)
+            if len(prices) > history_len:
+                change = abs((prices[1] / prices[0]) - 1)
+                n -= 1
+                delta = change - mean
+                mean -= delta / n
+                m2 = max(0.0, m2 - delta * (change - mean))
+                del prices[:-history_len]
+            stats[0], stats[1], stats[2], stats[3] = n, mean, m2, stats[3] + 1
+        
+        if len(prices) >= 3:
+            volatility = math.sqrt(m2 / (n - 1)) if n > 1 else mean
+            old_volatility = volatilities.get(product, volatility)
+            volatility = old_volatility + 0.2 * (volatility - old_volatility)
+            volatilities[product] = volatility
+            return volatility
+        
+        return volatilities.setdefault(product, 0.01)
     
     def calculate_trend(self, product, mid_price, trader_data):
-        if "last_mid_prices" not in trader_data:
-            trader_data["last_mid_prices"] = {}
-        if "market_trend" not in trader_data:
-            trader_data["market_trend"] = {}
-        if "price_history" not in trader_data:
-            trader_data["price_history"] = {}
-            
-        last_mid = trader_data["last_mid_prices"].get(product, mid_price)
+        market_trend = trader_data["market_trend"]
+        last_mid_prices = trader_data["last_mid_prices"]
+        last_mid = last_mid_prices.get(product, mid_price)
         
-        if product in trader_data["price_history"] and len(trader_data["price_history"][product]) >= 6:
-            prices = trader_data["price_history"][product]
-            short_ma = sum(prices[-3:]) / 3
-            med_ma = sum(prices[-6:]) / 6
-            long_ma = sum(prices) / len(prices)
-            
-            if short_ma > med_ma and med_ma > long_ma:
-                current_trend = 1.5
-            elif short_ma > med_ma:
-                current_trend = 1.0
-            elif short_ma < med_ma and med_ma < long_ma:
-                current_trend = -1.5
-            elif short_ma < med_ma:
-                current_trend = -1.0
-            else:
-                current_trend = 0
-                
-            if len(prices) >= 4:
-                recent_change = (prices[-1] - prices[-4]) / prices[-4]
-                momentum = 0.5 * (1 if recent_change > 0 else -1 if recent_change < 0 else 0)
-                current_trend += momentum
+        history = trader_data["price_history"].get(product)
+        if history is not None and len(history) >= 6:
+            current_trend = _trend_kernel(_as_array(history))
         else:
             price_change_pct = (mid_price - last_mid) / last_mid if last_mid != 0 else 0
             if price_change_pct > 0.005:
@@ -344,121 +465,101 @@ class Trader:
             else:
                 current_trend = 0
                 
-        old_trend = trader_data["market_trend"].get(product, 0)
-        trader_data["market_trend"][product] = 0.7 * old_trend + 0.3 * current_trend
-        trader_data["last_mid_prices"][product] = mid_price
+        old_trend = market_trend.get(product, 0)
+        trend = old_trend + 0.3 * (current_trend - old_trend)
+        market_trend[product] = trend
+        last_mid_prices[product] = mid_price
         
-        return trader_data["market_trend"][product]
+        return trend
     
-    def detect_drawdown(self, product, trader_data, position, mid_price):
-        position_limit = self.get_position_limit(product)
-        if "pnl_history" not in trader_data:
-            trader_data["pnl_history"] = {}
-        if "position_history" not in trader_data:
-            trader_data["position_history"] = {}
-        if "in_drawdown" not in trader_data:
-            trader_data["in_drawdown"] = {}
-        if "last_mid_prices" not in trader_data:
-            trader_data["last_mid_prices"] = {}
-        if "drawdown_counter" not in trader_data:
-            trader_data["drawdown_counter"] = {}
+    def detect_drawdown(self, product, trader_data, position, mid_price, position_limit):
+        protection = self.DRAWDOWN_PROTECTION
+        window_size = protection["window_size"]
+        pnl_history = trader_data["pnl_history"].setdefault(product, [])
+        position_history = trader_data["position_history"].setdefault(product, [])
+        in_drawdown = trader_data["in_drawdown"].get(product, False)
+        drawdown_counter = trader_data["drawdown_counter"].get(product, 0)
             
-        if product not in trader_data["pnl_history"]:
-            trader_data["pnl_history"][product] = []
-        if product not in trader_data["position_history"]:
-            trader_data["position_history"][product] = []
-        if product not in trader_data["in_drawdown"]:
-            trader_data["in_drawdown"][product] = False
-        if product not in trader_data["drawdown_counter"]:
-            trader_data["drawdown_counter"][product] = 0
-            
-        last_position = trader_data["position_history"][product][-1] if trader_data["position_history"][product] else 0
+        last_position = position_history[-1] if position_history else 0
         last_price = trader_data["last_mid_prices"].get(product, mid_price)
         
         if last_position != position:
             position_change = position - last_position
             price_change = mid_price - last_price
             trade_pnl = position_change * price_change
-            trader_data["pnl_history"][product].append(trade_pnl)
-            if len(trader_data["pnl_history"][product]) > self.DRAWDOWN_PROTECTION["window_size"]:
-                trader_data["pnl_history"][product] = trader_data["pnl_history"][product][-self.DRAWDOWN_PROTECTION["window_size"]:]
+            pnl_history.append(trade_pnl)
+            if len(pnl_history) > window_size:
+                del pnl_history[:-window_size]
         
-        trader_data["position_history"][product].append(position)
-        if len(trader_data["position_history"][product]) > 25:
-            trader_data["position_history"][product] = trader_data["position_history"][product][-25:]
+        position_history.append(position)
+        if len(position_history) > 25:
+            del position_history[:-25]
             
-        if len(trader_data["pnl_history"][product]) >= self.DRAWDOWN_PROTECTION["window_size"]:
-            recent_pnl = trader_data["pnl_history"][product]
-            cumulative_pnl = sum(recent_pnl)
-            if cumulative_pnl < -self.DRAWDOWN_PROTECTION["threshold"] * position_limit:
-                trader_data["in_drawdown"][product] = True
-                trader_data["drawdown_counter"][product] = 0
-            elif trader_data["in_drawdown"][product]:
-                trader_data["drawdown_counter"][product] += 1
-                if cumulative_pnl > 0 or trader_data["drawdown_counter"][product] >= 10:
-                    recovery_chance = self.DRAWDOWN_PROTECTION["recovery_factor"] * (1 + trader_data["drawdown_counter"][product] / 10)
-                    if random.random() < min(recovery_chance, 0.8):
-                        trader_data["in_drawdown"][product] = False
-                        trader_data["drawdown_counter"][product] = 0
-        
-        return trader_data["in_drawdown"].get(product, False), trader_data
+        if len(pnl_history) >= window_size:
+            cumulative_pnl = sum(pnl_history)
+            if cumulative_pnl < -protection["threshold"] * position_limit:
+                in_drawdown = True
+                drawdown_counter = 0
+            elif in_drawdown:
+                drawdown_counter += 1
+                if cumulative_pnl > 0 or drawdown_counter >= 10:
+                    recovery_score = protection["recovery_factor"] * (1 + drawdown_counter / 10)
+                    if recovery_score >= protection["recovery_threshold"]:
+                        in_drawdown = False
+                        drawdown_counter = 0
+        
+        trader_data["in_drawdown"][product] = in_drawdown
+        trader_data["drawdown_counter"][product] = drawdown_counter
+        return in_drawdown, trader_data
     
-    def should_take_order(self, product, price, fair_value, take_width, is_buy, regime, volatility):
-        adjusted_take_width = take_width
-        if regime == "volatile":
-            adjusted_take_width = take_width * 1.4
-        elif regime == "trending":
-            adjusted_take_width = take_width * 0.7
-        elif regime == "mean_reverting":
-            adjusted_take_width = take_width * 0.75
-            
+    def adjust_take_width(self, take_width, regime, volatility):
+        adjusted_take_width = take_width * self.REGIME_ADJUSTMENTS[regime]["take_mul"]
         volatility_adjustment = volatility * 80
         adjusted_take_width += volatility_adjustment
-        adjusted_take_width = max(1, min(adjusted_take_width, take_width * 2))
-        
-        if is_buy:
-            return price <= fair_value - adjusted_take_width
-        else:
-            return price >= fair_value + adjusted_take_width
+        return max(1, min(adjusted_take_width, take_width * 2))
             
-    def take_best_orders(self, product, fair_value, orders, order_depth, position, params, regime, volatility, in_drawdown):
-        take_width = params["take_width"]
-        position_limit = self.get_position_limit(product)
-        effective_limit = position_limit
-        if in_drawdown:
-            effective_limit = math.floor(position_limit * self.DRAWDOWN_PROTECTION["reduction_factor"])
-        effective_limit = math.floor(effective_limit * params["max_position_scale"])
+    def take_best_orders(self, product, fair_value, orders, order_depth, position, params, regime, volatility, effective_limit):
+        # The take width only depends on regime and volatility, so both thresholds are fixed for the whole book walk
+        adjusted_take_width = self.adjust_take_width(params["take_width"], regime, volatility)
+        buy_threshold = fair_value - adjusted_take_width
+        sell_threshold = fair_value + adjusted_take_width
         
         buy_order_volume = 0
         sell_order_volume = 0
+        # (price, signed quantity) fills, turned into Orders in one pass at the end
+        fills = []
         
-        if len(order_depth.sell_orders) != 0:
+        # Most ticks the best level is not takeable, so test it before paying for a full sort
+        if order_depth.sell_orders and min(order_depth.sell_orders) <= buy_threshold:
             sell_prices = sorted(order_depth.sell_orders.keys())
             for price in sell_prices:
                 amount = abs(order_depth.sell_orders[price])
-                if self.should_take_order(product, price, fair_value, take_width, True, regime, volatility):
+                if price <= buy_threshold:
                     max_buy = effective_limit - position - buy_order_volume
                     quantity = min(amount, max_buy)
-                    orders.append(Order(product, price, quantity))
+                    fills.append((price, quantity))
                     buy_order_volume += quantity
                     if buy_order_volume >= max_buy:
                         break
                 else:
                     break
         
-        if len(order_depth.buy_orders) != 0:
+        if order_depth.buy_orders and max(order_depth.buy_orders) >= sell_threshold:
             buy_prices = sorted(order_depth.buy_orders.keys(), reverse=True)
             for price in buy_prices:
                 amount = order_depth.buy_orders[price]
-                if self.should_take_order(product, price, fair_value, take_width, False, regime, volatility):
+                if price >= sell_threshold:
                     max_sell = effective_limit + position - sell_order_volume
                     quantity = min(amount, max_sell)
-                    orders.append(Order(product, price, -quantity))
+                    fills.append((price, -quantity))
                     sell_order_volume += quantity
                     if sell_order_volume >= max_sell:
                         break
                 else:
                     break
+        
+        if fills:
+            orders.extend([Order(product, price, quantity) for price, quantity in fills])
                     
         return orders, buy_order_volume, sell_order_volume
     
@@ -466,34 +567,20 @@ class Trader:
         alpha = params["alpha"]
         trend_factor = params["trend_factor"]
         
-        if "ema_prices" not in trader_data:
-            trader_data["ema_prices"] = {}
-        if "volatility" not in trader_data:
-            trader_data["volatility"] = {}
-        if "fair_values" not in trader_data:
-            trader_data["fair_values"] = {}
-        
-        if regime == "volatile":
-            alpha = min(0.7, alpha * 1.5)
-        elif regime == "trending":
-            alpha = min(0.6, alpha * 1.3)
-        elif regime == "mean_reverting":
-            alpha = max(0.15, alpha * 0.7)
-        
-        if product not in trader_data["ema_prices"]:
-            trader_data["ema_prices"][product] = mid_price
+        adjustments = self.REGIME_ADJUSTMENTS[regime]
+        alpha = max(adjustments["alpha_floor"], min(adjustments["alpha_cap"], alpha * adjustments["alpha_mul"]))
+        
+        ema_prices = trader_data["ema_prices"]
+        old_ema = ema_prices.get(product)
+        if old_ema is None:
+            ema_prices[product] = mid_price
             fair_value = mid_price
         else:
-            old_ema = trader_data["ema_prices"][product]
-            new_ema = alpha * mid_price + (1 - alpha) * old_ema
-            trader_data["ema_prices"][product] = new_ema
+            new_ema = old_ema + alpha * (mid_price - old_ema)
+            ema_prices[product] = new_ema
             
             trend = self.calculate_trend(product, mid_price, trader_data)
-            regime_trend_factor = trend_factor
-            if regime == "trending":
-                regime_trend_factor = trend_factor * 1.7
-            elif regime == "mean_reverting":
-                regime_trend_factor = trend_factor * 0.4
+            regime_trend_factor = trend_factor * adjustments["trend_mul"]
             
             trend_adjustment = trend * regime_trend_factor * trader_data["volatility"].get(product, 0.01) * mid_price
             if params["mean_reversion"] and regime != "trending":
@@ -504,24 +591,18 @@ class Trader:
         trader_data["fair_values"][product] = fair_value
         return fair_value, trader_data
         
-    def calculate_spread(self, product, fair_value, trader_data, params, regime, in_drawdown):
-        if "volatility" not in trader_data:
-            trader_data["volatility"] = {}
-        if "current_position" not in trader_data:
-            trader_data["current_position"] = {}
-            
+    def calculate_spread(self, product, fair_value, trader_data, params, regime, in_drawdown, position_limit):
         volatility = trader_data["volatility"].get(product, 0.01)
         spread_factor = params["spread_factor"]
         min_spread = params["min_spread"]
         
-        if regime == "volatile":
-            spread_factor *= 1.4
-            min_spread = max(min_spread + 1, min_spread * 1.4)
-        elif regime == "trending":
-            spread_factor *= 0.8
-            min_spread = max(1, min_spread - 1)
-        elif regime == "mean_reverting":
-            spread_factor *= 1.1
+        adjustments = self.REGIME_ADJUSTMENTS[regime]
+        spread_factor *= adjustments["spread_mul"]
+        min_spread = max(
+            min_spread + adjustments["min_spread_add"],
+            min_spread * adjustments["min_spread_mul"],
+            adjustments["min_spread_floor"]
+        )
             
         if in_drawdown:
             spread_factor *= 1.3
@@ -533,58 +614,43 @@ class Trader:
         )
         
         position = trader_data["current_position"].get(product, 0)
-        position_limit = self.get_position_limit(product)
         position_ratio = abs(position) / position_limit if position_limit > 0 else 0
         risk_aversion = params["risk_aversion"]
         position_adjustment = math.ceil(math.log(1 + 5 * position_ratio) * base_spread * risk_aversion)
         
         return base_spread + position_adjustment
     
-    def make_market(self, product, fair_value, spread, orders, position, trader_data, params, regime, in_drawdown):
-        position_limit = self.get_position_limit(product)
+    def make_market(self, product, fair_value, spread, orders, position, trader_data, params, regime, in_drawdown, effective_limit):
         aggressive_edge = params["aggressive_edge"]
         
-        effective_limit = position_limit
-        if in_drawdown:
-            effective_limit = math.floor(position_limit * self.DRAWDOWN_PROTECTION["reduction_factor"])
-        effective_limit = math.floor(effective_limit * params["max_position_scale"])
-        
-        if regime == "volatile":
-            aggressive_edge *= 0.8
-        elif regime == "trending":
-            aggressive_edge *= 1.3
-        elif regime == "mean_reverting":
-            aggressive_edge *= 1.1
+        adjustments = self.REGIME_ADJUSTMENTS[regime]
+        aggressive_edge *= adjustments["agg_mul"]
         
         half_spread = spread / 2
-        if "market_trend" not in trader_data:
-            trader_data["market_trend"] = {}
         trend = trader_data["market_trend"].get(product, 0)
         position_bias = -position / effective_limit if effective_limit > 0 else 0
         bias_factor = (trend * 0.3) + (position_bias * 0.7)
         bias_adjustment = half_spread * bias_factor * 0.5
         
-        bid_price = math.floor(fair_value - half_spread + bias_adjustment)
-        ask_price = math.ceil(fair_value + half_spread + bias_adjustment)
+        # Prices are positive: int() floors them and -int(-x // 1) rounds them up
+        bid_price = int(fair_value - half_spread + bias_adjustment)
+        ask_price = -int(-(fair_value + half_spread + bias_adjustment) // 1)
         
         if ask_price - bid_price < params["min_spread"]:
             spread_adjustment = (params["min_spread"] - (ask_price - bid_price)) / 2
-            bid_price = math.floor(bid_price - spread_adjustment)
-            ask_price = math.ceil(ask_price + spread_adjustment)
+            bid_price = int(bid_price - spread_adjustment)
+            ask_price = -int(-(ask_price + spread_adjustment) // 1)
         
         remaining_buy = effective_limit - position
         remaining_sell = effective_limit + position
         base_size = max(1, int(effective_limit * 0.1))
         
-        if regime == "volatile":
-            base_size = max(1, int(base_size * 0.8))
-        elif regime == "trending":
-            base_size = max(1, int(base_size * 1.3))
+        base_size = max(1, int(base_size * adjustments["size_mul"]))
         if in_drawdown:
             base_size = max(1, int(base_size * 0.7))
             
-        buy_size = min(remaining_buy, math.ceil(base_size * (1 + aggressive_edge * (1 - position_bias))))
-        sell_size = min(remaining_sell, math.ceil(base_size * (1 + aggressive_edge * (1 + position_bias))))
+        buy_size = min(remaining_buy, -int(-base_size * (1 + aggressive_edge * (1 - position_bias)) // 1))
+        sell_size = min(remaining_sell, -int(-base_size * (1 + aggressive_edge * (1 + position_bias)) // 1))
         
         if buy_size > 0:
             orders.append(Order(product, bid_price, buy_size))
@@ -593,42 +659,51 @@ class Trader:
             
         return orders
     
-    def manage_basket_arbitrage(self, products, inventory, trader_data, order_depths, orders):
-        if "fair_values" not in trader_data:
-            trader_data["fair_values"] = {}
-        if "arbitrage_executed" not in trader_data:
-            trader_data["arbitrage_executed"] = {}
+    def get_best_quotes(self, order_depths):
+        # (best bid, bid volume, best ask, ask volume) per product, scanned once per tick
+        best = {}
+        for product, depth in order_depths.items():
+            bid = max(depth.buy_orders) if depth.buy_orders else None
+            ask = min(depth.sell_orders) if depth.sell_orders else None
+            best[product] = (
+                bid,
+                depth.buy_orders[bid] if bid is not None else 0,
+                ask,
+                abs(depth.sell_orders[ask]) if ask is not None else 0
+            )
+        return best
+    
+    def manage_basket_arbitrage(self, inventory, trader_data, best, orders):
+        # best holds a quote for every product in the order depths, so it doubles as the membership test
+        limits = self._limit_cache
+        fair_values = trader_data["fair_values"]
+        min_profit = self.ARBITRAGE_PARAMS["min_profit_per_lot"]
+        max_lots_per_trade = self.ARBITRAGE_PARAMS["max_arbitrage_lots"]
             
         # Traditional basket arbitrage
-        for basket_name, composition in self.BASKET_COMPOSITION.items():
-            if basket_name not in products:
+        for basket_name, (names, qtys, component_limits) in self._basket_soa.items():
+            basket_quote = best.get(basket_name)
+            if basket_quote is None:
                 continue
-            all_components_available = all(component in products for component in composition)
+            all_components_available = all(component in best for component in names)
             if not all_components_available:
                 continue
                 
             basket_position = inventory.get(basket_name, 0)
-            basket_position_limit = self.get_position_limit(basket_name)
-            basket_depth = order_depths.get(basket_name)
-            if not basket_depth:
-                continue
+            basket_position_limit = limits[basket_name]
+            basket_bid, basket_bid_volume, basket_ask, basket_ask_volume = basket_quote
                 
             component_value = 0
             component_limits_ok = True
-            component_positions = {}
-            for component, quantity in composition.items():
-                component_position = inventory.get(component, 0)
-                component_limit = self.get_position_limit(component)
-                component_positions[component] = component_position
-                if component in trader_data["fair_values"]:
-                    component_value += trader_data["fair_values"][component] * quantity
+            for component, quantity in zip(names, qtys):
+                if component in fair_values:
+                    component_value += fair_values[component] * quantity
                 else:
-                    component_depth = order_depths.get(component)
-                    if not component_depth or not component_depth.buy_orders or not component_depth.sell_orders:
+                    component_bid, _, component_ask, _ = best[component]
+                    if component_bid is None or component_ask is None:
                         component_limits_ok = False
                         break
-                    component_mid = (max(component_depth.buy_orders.keys()) + min(component_depth.sell_orders.keys())) / 2
-                    component_value += component_mid * quantity
+                    component_value += (component_bid + component_ask) / 2 * quantity
             
             if not component_limits_ok:
                 continue
@@ -640,78 +715,66 @@ class Trader:
                     "buy_components_sell_basket": 0
                 }
             
-            if basket_depth.sell_orders:
-                basket_ask = min(basket_depth.sell_orders.keys())
-                basket_ask_volume = abs(basket_depth.sell_orders[basket_ask])
+            if basket_ask is not None:
                 potential_profit = expected_basket_value - basket_ask
-                if potential_profit >= self.ARBITRAGE_PARAMS["min_profit_per_lot"]:
+                if potential_profit >= min_profit:
                     max_baskets = min(
                         basket_ask_volume,
-                        self.ARBITRAGE_PARAMS["max_arbitrage_lots"],
+                        max_lots_per_trade,
                         basket_position_limit - basket_position
                     )
-                    for component, quantity in composition.items():
-                        component_position = component_positions[component]
-                        component_limit = self.get_position_limit(component)
-                        max_component_lots = (component_limit - component_position) // quantity
-                        max_baskets = min(max_baskets, max_component_lots)
+                    max_baskets = min(max_baskets, min(
+                        (limit - inventory.get(component, 0)) // quantity
+                        for component, quantity, limit in zip(names, qtys, component_limits)
+                    ))
                     if max_baskets > 0:
-                        orders.append(Order(basket_name, basket_ask, max_baskets))
-                        for component, quantity in composition.items():
-                            component_depth = order_depths.get(component)
-                            if component_depth and component_depth.buy_orders:
-                                component_bid = max(component_depth.buy_orders.keys())
-                                orders.append(Order(component, component_bid, -max_baskets * quantity))
+                        batch = [(basket_name, basket_ask, max_baskets)]
+                        batch.extend(
+                            (component, best[component][0], -max_baskets * quantity)
+                            for component, quantity in zip(names, qtys)
+                            if best[component][0] is not None
+                        )
+                        orders.extend([Order(*order_args) for order_args in batch])
                         trader_data["arbitrage_executed"][basket_name]["buy_basket_sell_components"] += max_baskets
             
-            if basket_depth.buy_orders:
-                basket_bid = max(basket_depth.buy_orders.keys())
-                basket_bid_volume = basket_depth.buy_orders[basket_bid]
+            if basket_bid is not None:
                 potential_profit = basket_bid - expected_basket_value
-                if potential_profit >= self.ARBITRAGE_PARAMS["min_profit_per_lot"]:
+                if potential_profit >= min_profit:
                     max_baskets = min(
                         basket_bid_volume,
-                        self.ARBITRAGE_PARAMS["max_arbitrage_lots"],
+                        max_lots_per_trade,
                         basket_position_limit + basket_position
                     )
-                    for component, quantity in composition.items():
-                        component_position = component_positions[component]
-                        component_limit = self.get_position_limit(component)
-                        max_component_lots = (component_position + component_limit) // quantity
-                        max_baskets = min(max_baskets, max_component_lots)
+                    max_baskets = min(max_baskets, min(
+                        (inventory.get(component, 0) + limit) // quantity
+                        for component, quantity, limit in zip(names, qtys, component_limits)
+                    ))
                     if max_baskets > 0:
-                        orders.append(Order(basket_name, basket_bid, -max_baskets))
-                        for component, quantity in composition.items():
-                            component_depth = order_depths.get(component)
-                            if component_depth and component_depth.sell_orders:
-                                component_ask = min(component_depth.sell_orders.keys())
-                                orders.append(Order(component, component_ask, max_baskets * quantity))
+                        batch = [(basket_name, basket_bid, -max_baskets)]
+                        batch.extend(
+                            (component, best[component][2], max_baskets * quantity)
+                            for component, quantity in zip(names, qtys)
+                            if best[component][2] is not None
+                        )
+                        orders.extend([Order(*order_args) for order_args in batch])
                         trader_data["arbitrage_executed"][basket_name]["buy_components_sell_basket"] += max_baskets
         
         # Voucher-Rock arbitrage
         rock_product = "VOLCANIC_ROCK"
-        if rock_product in products and rock_product in trader_data["fair_values"]:
-            rock_fair_value = trader_data["fair_values"][rock_product]
-            rock_depth = order_depths.get(rock_product)
+        rock_quote = best.get(rock_product)
+        if rock_quote is not None and rock_product in fair_values:
+            rock_fair_value = fair_values[rock_product]
+            rock_bid, rock_bid_volume, rock_ask, rock_ask_volume = rock_quote
             rock_position = inventory.get(rock_product, 0)
-            rock_position_limit = self.get_position_limit(rock_product)
+            rock_position_limit = limits[rock_product]
             
-            voucher_strikes = {
-                "VOLCANIC_ROCK_VOUCHER_9500": 9500,
-                "VOLCANIC_ROCK_VOUCHER_9750": 9750,
-                "VOLCANIC_ROCK_VOUCHER_10000": 10000,
-                "VOLCANIC_ROCK_VOUCHER_10250": 10250,
-                "VOLCANIC_ROCK_VOUCHER_10500": 10500
-            }
-            
-            for voucher, strike in voucher_strikes.items():
-                if voucher not in products:
-                    continue
-                voucher_depth = order_depths.get(voucher)
-                if not voucher_depth:
+            for voucher, strike in self.VOUCHER_STRIKES:
+                voucher_quote = best.get(voucher)
+                if voucher_quote is None:
                     continue
+                voucher_bid, voucher_bid_volume, voucher_ask, voucher_ask_volume = voucher_quote
                 voucher_position = inventory.get(voucher, 0)
-                voucher_position_limit = self.get_position_limit(voucher)
+                voucher_position_limit = limits[voucher]
                 
                 # Calculate intrinsic value
                 intrinsic_value = max(0, rock_fair_value - strike)
@@ -727,65 +790,66 @@ class Trader:
                     }
                 
                 # Buy voucher, sell rock
-                if voucher_depth.sell_orders and rock_depth and rock_depth.buy_orders:
-                    voucher_ask = min(voucher_depth.sell_orders.keys())
-                    voucher_ask_volume = abs(voucher_depth.sell_orders[voucher_ask])
-                    rock_bid = max(rock_depth.buy_orders.keys())
+                if voucher_ask is not None and rock_bid is not None:
                     potential_profit = (rock_bid - strike) - voucher_ask
-                    if potential_profit >= self.ARBITRAGE_PARAMS["min_profit_per_lot"]:
+                    if potential_profit >= min_profit:
                         max_lots = min(
                             voucher_ask_volume,
-                            rock_depth.buy_orders[rock_bid],
-                            self.ARBITRAGE_PARAMS["max_arbitrage_lots"],
+                            rock_bid_volume,
+                            max_lots_per_trade,
                             voucher_position_limit - voucher_position,
                             rock_position_limit + rock_position
                         )
                         if max_lots > 0:
-                            orders.append(Order(voucher, voucher_ask, max_lots))
-                            orders.append(Order(rock_product, rock_bid, -max_lots))
+                            orders.extend((
+                                Order(voucher, voucher_ask, max_lots),
+                                Order(rock_product, rock_bid, -max_lots)
+                            ))
                             trader_data["arbitrage_executed"][voucher]["buy_voucher_sell_rock"] += max_lots
                 
                 # Buy rock, sell voucher
-                if voucher_depth.buy_orders and rock_depth and rock_depth.sell_orders:
-                    voucher_bid = max(voucher_depth.buy_orders.keys())
-                    voucher_bid_volume = voucher_depth.buy_orders[voucher_bid]
-                    rock_ask = min(rock_depth.sell_orders.keys())
+                if voucher_bid is not None and rock_ask is not None:
                     potential_profit = voucher_bid - max(0, rock_ask - strike)
-                    if potential_profit >= self.ARBITRAGE_PARAMS["min_profit_per_lot"]:
+                    if potential_profit >= min_profit:
                         max_lots = min(
                             voucher_bid_volume,
-                            abs(rock_depth.sell_orders[rock_ask]),
-                            self.ARBITRAGE_PARAMS["max_arbitrage_lots"],
+                            rock_ask_volume,
+                            max_lots_per_trade,
                             voucher_position_limit + voucher_position,
                             rock_position_limit - rock_position
                         )
                         if max_lots > 0:
-                            orders.append(Order(voucher, voucher_bid, -max_lots))
-                            orders.append(Order(rock_product, rock_ask, max_lots))
+                            orders.extend((
+                                Order(voucher, voucher_bid, -max_lots),
+                                Order(rock_product, rock_ask, max_lots)
+                            ))
                             trader_data["arbitrage_executed"][voucher]["buy_rock_sell_voucher"] += max_lots
         
         return orders, trader_data
     
     def run(self, state: TradingState):
-        try:
-            trader_data = json.loads(state.traderData) if state.traderData else {}
-        except (json.JSONDecodeError, TypeError):
-            trader_data = {}
+        if self._trader_data is not None and state.traderData == self._trader_data_json:
+            trader_data = self._trader_data
+        else:
+            try:
+                trader_data = json.loads(state.traderData) if state.traderData else {}
+            except (json.JSONDecodeError, TypeError):
+                trader_data = {}
+            
+        for key in self.TRADER_SCHEMA:
+            trader_data.setdefault(key, {})
             
         result = {}
-        if "current_position" not in trader_data:
-            trader_data["current_position"] = {}
-        
-        for product in state.position:
-            trader_data["current_position"][product] = state.position.get(product, 0)
+        positions = state.position
+        trader_data["current_position"].update(positions)
+        best_quotes = self.get_best_quotes(state.order_depths)
             
-        if len(state.order_depths) > 1:
+        if len(state.order_depths) > 1 and not self.ARBITRAGE_TRIGGERS.isdisjoint(state.order_depths):
             arbitrage_orders = []
             arbitrage_orders, trader_data = self.manage_basket_arbitrage(
-                state.order_depths.keys(),
-                state.position,
+                positions,
                 trader_data,
-                state.order_depths,
+                best_quotes,
                 arbitrage_orders
             )
             for order in arbitrage_orders:
@@ -793,51 +857,57 @@ class Trader:
                     result[order.symbol] = []
                 result[order.symbol].append(order)
             
+        params_cache = self._params_cache
+        limits = self._limit_cache
         for product in state.order_depths.keys():
-            if product not in state.position:
+            position = positions.get(product)
+            if position is None:
                 continue
                 
             order_depth = state.order_depths[product]
-            position = state.position.get(product, 0)
+            best_bid, _, best_ask, _ = best_quotes[product]
             
-            if not order_depth.buy_orders and not order_depth.sell_orders:
+            if best_bid is None and best_ask is None:
                 continue
                 
-            if len(order_depth.sell_orders) > 0 and len(order_depth.buy_orders) > 0:
-                best_bid = max(order_depth.buy_orders.keys())
-                best_ask = min(order_depth.sell_orders.keys())
+            if best_bid is not None and best_ask is not None:
                 if best_bid >= best_ask:
                     continue
                 mid_price = (best_bid + best_ask) / 2
-            elif len(order_depth.sell_orders) > 0:
-                mid_price = min(order_depth.sell_orders.keys())
+            elif best_ask is not None:
+                mid_price = best_ask
             else:
-                mid_price = max(order_depth.buy_orders.keys())
+                mid_price = best_bid
                 
-            params = self.get_product_params(product)
+            params = params_cache[product]
+            position_limit = limits[product]
             volatility = self.calculate_volatility(product, mid_price, trader_data)
             regime, trader_data = self.detect_market_regime(product, trader_data, mid_price)
-            in_drawdown, trader_data = self.detect_drawdown(product, trader_data, position, mid_price)
+            in_drawdown, trader_data = self.detect_drawdown(product, trader_data, position, mid_price, position_limit)
             fair_value, trader_data = self.calculate_fair_value(product, mid_price, trader_data, params, regime)
+            effective_limit = self.get_effective_limit(position_limit, params, in_drawdown)
             
             orders = []
             orders, buy_order_volume, sell_order_volume = self.take_best_orders(
                 product, fair_value, orders, order_depth, position, 
-                params, regime, volatility, in_drawdown
+                params, regime, volatility, effective_limit
             )
             
             adjusted_position = position + buy_order_volume - sell_order_volume
             trader_data["current_position"][product] = adjusted_position
-            spread = self.calculate_spread(product, fair_value, trader_data, params, regime, in_drawdown)
+            spread = self.calculate_spread(product, fair_value, trader_data, params, regime, in_drawdown, position_limit)
             orders = self.make_market(
                 product, fair_value, spread, orders, adjusted_position, 
-                trader_data, params, regime, in_drawdown
+                trader_data, params, regime, in_drawdown, effective_limit
             )
             
             if orders:
                 result[product] = orders
                 
-        traderData = json.dumps(trader_data)
+        # Positions are rebuilt from state.position every tick, so they are not persisted
+        del trader_data["current_position"]
+        traderData = json.dumps(trader_data, separators=(",", ":"))
+        self._trader_data, self._trader_data_json = trader_data, traderData
         conversions = 0
         
-        return result, conversions, traderData
\ No newline at end of file
+        return result, conversions, traderData
@@ -1,7 +1,46 @@
 import json
 import math
-import statistics
 from datamodel import OrderDepth, TradingState, Order
+from typing import List, Dict
+
+try:
+    from numba import njit
+    import numpy as np
+    NUMBA_AVAILABLE = True
+    
+    def _as_array(values):
+        return np.asarray(values, dtype=np.float64)
+except ImportError:
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+    NUMBA_AVAILABLE = False
+    
+    def _as_array(values):
+        return values
+
+@njit
+def _scan_voucher_pairs(strikes, bids, bid_volumes, asks, ask_volumes, positions, limits):
+    """(i, j, qty) for every lower strike i whose ask is below the bid of a higher strike j.
+    Missing asks are +inf and missing bids -inf so those pairs never cross."""
+    pairs = []
+    n = len(strikes)
+    for i in range(n):
+        for j in range(i + 1, n):
+            if strikes[i] >= strikes[j]:
+                continue
+            if bids[j] > asks[i]:
+                qty = min(bid_volumes[j], ask_volumes[i], limits[j] + positions[j], limits[i] - positions[i])
+                if qty > 0:
+                    pairs.append((i, j, qty))
+    return pairs
+
+if NUMBA_AVAILABLE:
+    _scan_voucher_pairs(
+        _as_array([9500, 9750]), _as_array([10.0, 12.0]), _as_array([5.0, 5.0]),
+        _as_array([11.0, 13.0]), _as_array([5.0, 5.0]), _as_array([0, 0]), _as_array([200, 200])
+    )
 
 class Trader:
     # Position limits for each product
@@ -29,34 +68,91 @@ class Trader:
         ("VOLCANIC_ROCK_VOUCHER_10500", 10500)
     ]
     ROCK_PRODUCT = "VOLCANIC_ROCK"
+    # Products handled by the option logic rather than plain market-making
+    OPTION_PRODUCTS = frozenset([ROCK_PRODUCT] + [v[0] for v in VOUCHERS])
     T = 4  # Time to expiration in days (Round 3, expires in 7 days from Round 1)
+    VOL_WINDOW = 99  # Log returns kept for volatility (100 mid-prices)
+
+    def __init__(self):
+        # The dict behind the last traderData we returned, reused while the exchange hands that string back
+        self._trader_data = None
+        self._trader_data_json = None
 
     def norm_cdf(self, x):
-        """Approximate cumulative normal distribution function."""
+        """Cumulative standard normal distribution function."""
+        # Saturate past +-6 as the polynomial did, so deep out-of-the-money deltas stay exactly 0
         if x > 6:
             return 1.0
         if x < -6:
             return 0.0
-        t = 1 / (1 + 0.2316419 * abs(x))
-        c = (0.31938153 * t - 0.356563782 * t**2 + 1.781477937 * t**3 -
-             1.821255978 * t**4 + 1.330274429 * t**5)
-        n = 1 - c * (1 / math.sqrt(2 * math.pi)) * math.exp(-x**2 / 2)
-        return n if x >= 0 else 1 - n
-
-    def black_scholes_call(self, S, K, T, sigma):
-        """Calculate call option price using Black-Scholes model."""
-        if T <= 0 or sigma <= 0:
-            return max(0, S - K)
-        d1 = (math.log(S / K) + (sigma**2 / 2) * T) / (sigma * math.sqrt(T))
-        d2 = d1 - sigma * math.sqrt(T)
-        return S * self.norm_cdf(d1) - K * self.norm_cdf(d2)
+        return 0.5 * math.erfc(-x * 0.7071067811865476)
 
-    def black_scholes_delta(self, S, K, T, sigma):
-        """Calculate delta of a call option."""
+    def black_scholes_all(self, S, T, sigma):
+        """Calculate Black-Scholes call prices and deltas for every voucher, in VOUCHERS order."""
         if T <= 0 or sigma <= 0:
-            return 1 if S > K else 0
-        d1 = (math.log(S / K) + (sigma**2 / 2) * T) / (sigma * math.sqrt(T))
-        return self.norm_cdf(d1)
+            return [(max(0, S - K), 1 if S > K else 0) for _, K in self.VOUCHERS]
+        # Terms shared by every strike, and d1 is reused for the delta
+        half_var_t = (sigma**2 / 2) * T
+        vol_sqrt_t = sigma * math.sqrt(T)
+        norm_cdf = self.norm_cdf
+        quotes = []
+        # Strikes with |d1| and |d2| above this many standard deviations price at intrinsic value
+        tail_cutoff = 6 * vol_sqrt_t
+        for _, K in self.VOUCHERS:
+            log_moneyness = math.log(S / K)
+            if abs(log_moneyness) - half_var_t > tail_cutoff:
+                quotes.append((S - K, 1) if S > K else (0, 0))
+                continue
+            d1 = (log_moneyness + half_var_t) / vol_sqrt_t
+            d2 = d1 - vol_sqrt_t
+            delta = norm_cdf(d1)
+            quotes.append((S * delta - K * norm_cdf(d2), delta))
+        return quotes
+
+    def get_best_quotes(self, order_depths):
+        """Best bid, bid volume, best ask and ask volume per product, scanned once per tick."""
+        best_quotes = {}
+        for product, order_depth in order_depths.items():
+            best_bid = max(order_depth.buy_orders) if order_depth.buy_orders else None
+            best_ask = min(order_depth.sell_orders) if order_depth.sell_orders else None
+            best_quotes[product] = (
+                best_bid,
+                order_depth.buy_orders[best_bid] if best_bid is not None else 0,
+                best_ask,
+                abs(order_depth.sell_orders[best_ask]) if best_ask is not None else 0
+            )
+        return best_quotes
+
+    def update_volatility(self, vol_state, S):
+        """Push the log return to S into the rolling window and return its sample stdev.
+        The window is a ring of returns with a running Welford mean and M2, so each
+        tick costs O(1) instead of re-slicing prices and recomputing the stdev."""
+        last = vol_state.get("last")
+        vol_state["last"] = S
+        if last is None:
+            return None
+        r = math.log(S / last)
+        returns = vol_state["returns"]
+        count, mean, m2 = vol_state["count"], vol_state["mean"], vol_state["m2"]
+        if count < self.VOL_WINDOW:
+            returns.append(r)
+            count += 1
+            delta = r - mean
+            mean += delta / count
+            m2 += delta * (r - mean)
+        else:
+            # Replace the oldest return in place, keeping the window size fixed
+            idx = vol_state["idx"]
+            old = returns[idx]
+            returns[idx] = r
+            vol_state["idx"] = (idx + 1) % self.VOL_WINDOW
+            new_mean = mean + (r - old) / count
+            m2 += (r - old) * (r - new_mean + old - mean)
+            mean = new_mean
+        vol_state["count"], vol_state["mean"], vol_state["m2"] = count, mean, m2
+        if count < 9:  # Same warm-up as 10 stored mid-prices
+            return None
+        return math.sqrt(max(m2, 0.0) / (count - 1))
 
     def get_position_limit(self, product):
         """Retrieve position limit for a given product."""
@@ -73,26 +169,31 @@ class Trader:
             tuple: (result: Dict[str, List[Order]], conversions: int, traderData: str)
         """
         result = {}
-        # Load trader data or initialize if empty
-        trader_data = json.loads(state.traderData) if state.traderData else {}
-        if "current_position" not in trader_data:
-            trader_data["current_position"] = {}
-        for product in state.position:
-            trader_data["current_position"][product] = state.position.get(product, 0)
+        # Load trader data or initialize if empty, skipping the parse when it is our own last output
+        if self._trader_data is not None and state.traderData == self._trader_data_json:
+            trader_data = self._trader_data
+        else:
+            trader_data = json.loads(state.traderData) if state.traderData else {}
+        best_quotes = self.get_best_quotes(state.order_depths)
+        no_quote = (None, 0, None, 0)
+        get_position = state.position.get
+        # Rock and voucher positions and limits, read once for all option legs
+        rock_position = get_position(self.ROCK_PRODUCT, 0)
+        rock_limit = self.get_position_limit(self.ROCK_PRODUCT)
+        voucher_positions = [get_position(voucher, 0) for voucher, _ in self.VOUCHERS]
+        voucher_limits = [self.get_position_limit(voucher) for voucher, _ in self.VOUCHERS]
 
         # Basic market-making for non-voucher/rock products
         for product in state.order_depths:
-            if product in [self.ROCK_PRODUCT] + [v[0] for v in self.VOUCHERS]:
+            if product in self.OPTION_PRODUCTS:
                 continue
-            order_depth = state.order_depths[product]
-            if not order_depth.buy_orders or not order_depth.sell_orders:
+            best_bid, _, best_ask, _ = best_quotes[product]
+            if best_bid is None or best_ask is None:
                 continue
-            best_bid = max(order_depth.buy_orders.keys())
-            best_ask = min(order_depth.sell_orders.keys())
             if best_bid >= best_ask:  # Invalid spread, skip
                 continue
             mid_price = (best_bid + best_ask) / 2
-            position = state.position.get(product, 0)
+            position = get_position(product, 0)
             position_limit = self.get_position_limit(product)
             spread = 2  # Fixed spread for simplicity
             bid_price = math.floor(mid_price - spread / 2)
@@ -109,118 +210,99 @@ class Trader:
 
         # Get current price of VOLCANIC_ROCK
         S = None
-        rock_depth = state.order_depths.get(self.ROCK_PRODUCT)
-        if rock_depth and rock_depth.buy_orders and rock_depth.sell_orders:
-            best_bid = max(rock_depth.buy_orders.keys())
-            best_ask = min(rock_depth.sell_orders.keys())
-            S = (best_bid + best_ask) / 2
+        rock_bid, _, rock_ask, rock_ask_volume = best_quotes.get(self.ROCK_PRODUCT, no_quote)
+        if rock_bid is not None and rock_ask is not None:
+            S = (rock_bid + rock_ask) / 2
 
-        # Update historical mid-prices for volatility calculation
-        if S is not None:
-            if "VOLCANIC_ROCK_mid_prices" not in trader_data:
-                trader_data["VOLCANIC_ROCK_mid_prices"] = []
-            trader_data["VOLCANIC_ROCK_mid_prices"].append(S)
-            N = 100  # Maximum number of historical prices to store
-            if len(trader_data["VOLCANIC_ROCK_mid_prices"]) > N:
-                trader_data["VOLCANIC_ROCK_mid_prices"] = trader_data["VOLCANIC_ROCK_mid_prices"][-N:]
-
-        # Estimate volatility (sigma)
+        # Estimate volatility (sigma) from the rolling window of log returns
         sigma = None
-        if "VOLCANIC_ROCK_mid_prices" in trader_data and len(trader_data["VOLCANIC_ROCK_mid_prices"]) >= 10:
-            prices = trader_data["VOLCANIC_ROCK_mid_prices"]
-            log_returns = [math.log(prices[i + 1] / prices[i]) for i in range(len(prices) - 1)]
-            if len(log_returns) > 1:
-                sigma = statistics.stdev(log_returns)
+        if S is not None:
+            vol_state = trader_data.setdefault(
+                "VOLCANIC_ROCK_vol",
+                {"last": None, "returns": [], "idx": 0, "count": 0, "mean": 0.0, "m2": 0.0}
+            )
+            sigma = self.update_volatility(vol_state, S)
         if sigma is None and S is not None:
             # Fallback to implied volatility from ATM voucher
             atm_voucher = "VOLCANIC_ROCK_VOUCHER_10000"
-            atm_depth = state.order_depths.get(atm_voucher)
-            if atm_depth and atm_depth.buy_orders and atm_depth.sell_orders:
-                C_market = (max(atm_depth.buy_orders.keys()) + min(atm_depth.sell_orders.keys())) / 2
+            atm_bid, _, atm_ask, _ = best_quotes.get(atm_voucher, no_quote)
+            if atm_bid is not None and atm_ask is not None:
+                C_market = (atm_bid + atm_ask) / 2
                 sigma = C_market / (0.4 * S * math.sqrt(self.T))  # Approximation: C ≈ 0.4 * S * σ * sqrt(T)
         if sigma is None or sigma <= 0:
             sigma = 0.1  # Default volatility if no better estimate
 
         if S is not None:
             # Options pricing, trading, and hedging
-            for voucher, K in self.VOUCHERS:
-                voucher_depth = state.order_depths.get(voucher)
-                if not voucher_depth or not voucher_depth.buy_orders or not voucher_depth.sell_orders:
+            theo = self.black_scholes_all(S, self.T, sigma)
+            for (voucher, K), (C_theo, delta), position, position_limit in zip(
+                    self.VOUCHERS, theo, voucher_positions, voucher_limits):
+                best_bid, best_bid_volume, best_ask, best_ask_volume = best_quotes.get(voucher, no_quote)
+                if best_bid is None or best_ask is None:
                     continue
-                best_bid = max(voucher_depth.buy_orders.keys())
-                best_ask = min(voucher_depth.sell_orders.keys())
                 mid_price = (best_bid + best_ask) / 2
-                C_theo = self.black_scholes_call(S, K, self.T, sigma)
-                delta = self.black_scholes_delta(S, K, self.T, sigma)
                 threshold = 10  # Mispricing threshold
-                position = state.position.get(voucher, 0)
-                position_limit = self.get_position_limit(voucher)
                 orders = result.setdefault(voucher, [])
                 rock_orders = result.setdefault(self.ROCK_PRODUCT, [])
 
                 # Buy if underpriced
                 if mid_price < C_theo - threshold and position < position_limit:
-                    qty = min(10, abs(voucher_depth.sell_orders.get(best_ask, 0)),
+                    qty = min(10, best_ask_volume,
                               position_limit - position)
                     if qty > 0:
                         orders.append(Order(voucher, best_ask, qty))
-                        rock_qty = math.ceil(delta * qty)
-                        if (rock_depth.buy_orders and
-                            rock_qty <= self.get_position_limit(self.ROCK_PRODUCT) + state.position.get(self.ROCK_PRODUCT, 0)):
-                            rock_orders.append(Order(self.ROCK_PRODUCT, max(rock_depth.buy_orders.keys()), -rock_qty))
+                        rock_qty = -int(-delta * qty // 1)  # ceil without the math call
+                        if (rock_bid is not None and
+                            rock_qty <= rock_limit + rock_position):
+                            rock_orders.append(Order(self.ROCK_PRODUCT, rock_bid, -rock_qty))
 
                 # Sell if overpriced
                 elif mid_price > C_theo + threshold and position > -position_limit:
-                    qty = min(10, voucher_depth.buy_orders.get(best_bid, 0),
+                    qty = min(10, best_bid_volume,
                               position_limit + position)
                     if qty > 0:
                         orders.append(Order(voucher, best_bid, -qty))
-                        rock_qty = math.ceil(delta * qty)
-                        if (rock_depth.sell_orders and
-                            rock_qty <= self.get_position_limit(self.ROCK_PRODUCT) - state.position.get(self.ROCK_PRODUCT, 0)):
-                            rock_orders.append(Order(self.ROCK_PRODUCT, min(rock_depth.sell_orders.keys()), rock_qty))
+                        rock_qty = -int(-delta * qty // 1)
+                        if (rock_ask is not None and
+                            rock_qty <= rock_limit - rock_position):
+                            rock_orders.append(Order(self.ROCK_PRODUCT, rock_ask, rock_qty))
 
             # Arbitrage: Voucher vs. Voucher
-            for i, (voucher1, K1) in enumerate(self.VOUCHERS):
-                for voucher2, K2 in self.VOUCHERS[i + 1:]:
-                    if K1 >= K2:
-                        continue
-                    depth1 = state.order_depths.get(voucher1)
-                    depth2 = state.order_depths.get(voucher2)
-                    if not (depth1 and depth2 and depth1.sell_orders and depth2.buy_orders):
+            vouchers = self.VOUCHERS
+            quotes = [best_quotes.get(voucher, no_quote) for voucher, _ in vouchers]
+            pairs = _scan_voucher_pairs(
+                _as_array([K for _, K in vouchers]),
+                _as_array([q[0] if q[0] is not None else -math.inf for q in quotes]),
+                _as_array([q[1] for q in quotes]),
+                _as_array([q[2] if q[2] is not None else math.inf for q in quotes]),
+                _as_array([q[3] for q in quotes]),
+                _as_array(voucher_positions),
+                _as_array(voucher_limits)
+            )
+            for i, j, qty in pairs:
+                qty = int(qty)
+                voucher1, voucher2 = vouchers[i][0], vouchers[j][0]
+                result.setdefault(voucher2, []).append(Order(voucher2, quotes[j][0], -qty))
+                result.setdefault(voucher1, []).append(Order(voucher1, quotes[i][2], qty))
+
+            # Arbitrage: Voucher vs. Rock - sell a voucher bid above the rock ask, buy the rock
+            if rock_ask is not None:
+                for (voucher, _), position, position_limit in zip(self.VOUCHERS, voucher_positions, voucher_limits):
+                    voucher_bid, voucher_bid_volume, _, _ = best_quotes.get(voucher, no_quote)
+                    if voucher_bid is None or voucher_bid <= rock_ask:
                         continue
-                    ask1 = min(depth1.sell_orders.keys())
-                    bid2 = max(depth2.buy_orders.keys())
-                    if bid2 > ask1:  # Sell higher strike, buy lower strike
-                        qty = min(
-                            depth2.buy_orders[bid2],
-                            abs(depth1.sell_orders[ask1]),
-                            self.get_position_limit(voucher2) + state.position.get(voucher2, 0),
-                            self.get_position_limit(voucher1) - state.position.get(voucher1, 0)
-                        )
-                        if qty > 0:
-                            result.setdefault(voucher2, []).append(Order(voucher2, bid2, -qty))
-                            result.setdefault(voucher1, []).append(Order(voucher1, ask1, qty))
-
-            # Arbitrage: Voucher vs. Rock
-            for voucher, _ in self.VOUCHERS:
-                voucher_depth = state.order_depths.get(voucher)
-                if not (voucher_depth and voucher_depth.buy_orders and rock_depth and rock_depth.sell_orders):
-                    continue
-                voucher_bid = max(voucher_depth.buy_orders.keys())
-                rock_ask = min(rock_depth.sell_orders.keys())
-                if voucher_bid > rock_ask:  # Sell voucher, buy rock
                     qty = min(
-                        voucher_depth.buy_orders[voucher_bid],
-                        abs(rock_depth.sell_orders[rock_ask]),
-                        self.get_position_limit(voucher) + state.position.get(voucher, 0),
-                        self.get_position_limit(self.ROCK_PRODUCT) - state.position.get(self.ROCK_PRODUCT, 0)
+                        voucher_bid_volume,
+                        rock_ask_volume,
+                        position_limit + position,
+                        rock_limit - rock_position
                     )
                     if qty > 0:
                         result.setdefault(voucher, []).append(Order(voucher, voucher_bid, -qty))
                         result.setdefault(self.ROCK_PRODUCT, []).append(Order(self.ROCK_PRODUCT, rock_ask, qty))
 
         # Serialize trader data and return
-        traderData = json.dumps(trader_data)
+        traderData = json.dumps(trader_data, separators=(",", ":"))
+        self._trader_data, self._trader_data_json = trader_data, traderData
         conversions = 0
-        return result, conversions, traderData
\ No newline at end of file
+        return result, conversions, traderData
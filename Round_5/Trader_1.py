@@ -1,6 +1,39 @@
 from datamodel import OrderDepth, TradingState, Order
 from typing import Dict, List, Tuple
-import json
+
+try:
+    import orjson
+    
+    def _loads(data):
+        return orjson.loads(data)
+    
+    def _dumps(obj):
+        return orjson.dumps(obj).decode()
+except ImportError:
+    import json
+    
+    def _loads(data):
+        return json.loads(data)
+    
+    def _dumps(obj):
+        return json.dumps(obj, separators=(",", ":"))
+
+def _clamp_trust(trust_score, performance):
+    """Base trust moved by performance / 1000 (capped at ±0.3), then clamped to [0.5, 1.5]."""
+    trust_modifier = performance / 1000
+    if trust_modifier > 0.3:
+        trust_modifier = 0.3
+    elif trust_modifier < -0.3:
+        trust_modifier = -0.3
+    trust_score += trust_modifier
+    if trust_score < 0.5:
+        return 0.5
+    if trust_score > 1.5:
+        return 1.5
+    return trust_score
+
+# Per-tick logging is costly on the exchange and only useful when debugging locally
+DEBUG = False
 
 class Trader:
     def __init__(self):
@@ -12,81 +45,55 @@ class Trader:
         self.base_profit_buffer = 1.5
         self.basket1_composition = {"CROISSANTS": 6, "JAMS": 3, "DJEMBES": 1}
         self.basket2_composition = {"CROISSANTS": 4, "JAMS": 2}
-        self.counterparty_profiles = self.initialize_counterparty_profiles()
+        # (basket, components, quantities) flattened once, so basket valuation walks plain tuples
+        self.basket_legs = tuple(
+            (basket, tuple(composition), tuple(composition.values()))
+            for basket, composition in (("PICNIC_BASKET1", self.basket1_composition),
+                                        ("PICNIC_BASKET2", self.basket2_composition))
+        )
+        self.initialize_counterparty_profiles()
         
     def initialize_counterparty_profiles(self):
-        profiles = {}
+        # Profile fields are kept as parallel dicts keyed by counterparty, so each read is one lookup
+        self.risk_levels = {}
+        self.trust_scores = {}
+        self.strategies = {}
+        
+        def add_profiles(traders, risk_level, trust_score, strategy):
+            for trader in traders:
+                self.risk_levels[trader] = risk_level
+                self.trust_scores[trader] = trust_score
+                self.strategies[trader] = strategy
+        
         # Ant traders - generally good at technical trading
-        ant_traders = ["Amir", "Ayumi", "Ari", "Anika"]
-        for trader in ant_traders:
-            profiles[trader] = {"risk_level": "medium", "trust_score": 0.7, "strategy": "technical"}
+        add_profiles(["Amir", "Ayumi", "Ari", "Anika"], "medium", 0.7, "technical")
         
         # Beetle traders - aggressive hoarders
-        beetle_traders = ["Boris", "Bashir", "Bonnie", "Blue"]
-        for trader in beetle_traders:
-            profiles[trader] = {"risk_level": "high", "trust_score": 0.5, "strategy": "momentum"}
+        add_profiles(["Boris", "Bashir", "Bonnie", "Blue"], "high", 0.5, "momentum")
         
         # Spider traders - methodical and patient
-        spider_traders = ["Sanjay", "Sami", "Sierra", "Santiago"]
-        for trader in spider_traders:
-            profiles[trader] = {"risk_level": "low", "trust_score": 0.8, "strategy": "value"}
+        add_profiles(["Sanjay", "Sami", "Sierra", "Santiago"], "low", 0.8, "value")
         
         # Mosquito traders - quick but unpredictable
-        mosquito_traders = ["Mikhail", "Mina", "Morgan", "Manuel"]
-        for trader in mosquito_traders:
-            profiles[trader] = {"risk_level": "high", "trust_score": 0.4, "strategy": "high_frequency"}
+        add_profiles(["Mikhail", "Mina", "Morgan", "Manuel"], "high", 0.4, "high_frequency")
         
         # Cockroach traders - resilient and survivors
-        cockroach_traders = ["Carlos", "Candice", "Carson", "Cristiano"]
-        for trader in cockroach_traders:
-            profiles[trader] = {"risk_level": "medium", "trust_score": 0.6, "strategy": "contrarian"}
-            
-        return profiles
-
-    def get_mid(self, product: str, state: TradingState) -> float:
-        """Calculate the mid price of a product."""
-        if product not in state.order_depths:
-            return None
-        bids = state.order_depths[product].buy_orders
-        asks = state.order_depths[product].sell_orders
-        if bids and asks:
-            return (max(bids.keys()) + min(asks.keys())) / 2
-        return None
-
-    def within_limits(self, state: TradingState, product: str, qty: int) -> bool:
-        """Check if a potential trade is within position limits."""
-        current_position = state.position.get(product, 0)
-        new_position = current_position + qty
-        return abs(new_position) <= self.position_limits[product]
+        add_profiles(["Carlos", "Candice", "Carson", "Cristiano"], "medium", 0.6, "contrarian")
     
-    def analyze_counterparties(self, state: TradingState):
-        """Analyze counterparties from recent trades."""
-        counterparty_data = {}
-        
-        # Extract counterparty info from recent trades
-        for product, trades in state.own_trades.items():
-            for trade in trades:
-                counterparty = trade.counter_party
-                if not counterparty:
-                    continue
-                    
-                if counterparty not in counterparty_data:
-                    counterparty_data[counterparty] = {"products": {}}
-                
-                if product not in counterparty_data[counterparty]["products"]:
-                    counterparty_data[counterparty]["products"][product] = []
-                    
-                counterparty_data[counterparty]["products"][product].append({
-                    "price": trade.price,
-                    "quantity": trade.quantity
-                })
-                
-                # Add profile data if available
-                if counterparty in self.counterparty_profiles:
-                    counterparty_data[counterparty]["profile"] = self.counterparty_profiles[counterparty]
-        
-        return counterparty_data
-        
+    def get_best_quotes(self, state: TradingState):
+        """Best bid, bid volume, best ask and ask volume per product, scanned once per tick."""
+        best_quotes = {}
+        for product, order_depth in state.order_depths.items():
+            best_bid = max(order_depth.buy_orders) if order_depth.buy_orders else None
+            best_ask = min(order_depth.sell_orders) if order_depth.sell_orders else None
+            best_quotes[product] = (
+                best_bid,
+                order_depth.buy_orders[best_bid] if best_bid is not None else 0,
+                best_ask,
+                order_depth.sell_orders[best_ask] if best_ask is not None else 0
+            )
+        return best_quotes
+
     def get_trader_state(self, state: TradingState):
         """Parse the trader state data."""
         if not state.traderData:
@@ -97,7 +104,7 @@ class Trader:
             }
         
         try:
-            return json.loads(state.traderData)
+            return _loads(state.traderData)
         except:
             return {
                 "price_history": {},
@@ -105,48 +112,52 @@ class Trader:
                 "preferred_counterparties": {}
             }
             
-    def update_price_history(self, trader_state, state: TradingState):
+    def update_price_history(self, trader_state, mids: Dict[str, float]):
         """Update price history in trader state."""
-        if "price_history" not in trader_state:
-            trader_state["price_history"] = {}
+        price_history = trader_state.setdefault("price_history", {})
             
         for product in self.position_limits:
-            if product not in trader_state["price_history"]:
-                trader_state["price_history"][product] = []
-                
-            mid = self.get_mid(product, state)
-            if mid:
-                trader_state["price_history"][product].append(mid)
-                if len(trader_state["price_history"][product]) > 5:  # Keep last 5 prices
-                    trader_state["price_history"][product].pop(0)
+            mid = mids.get(product)
+            if not mid:
+                continue
+            history = price_history.setdefault(product, [])
+            history.append(mid)
+            if len(history) > 5:  # Keep last 5 prices
+                del history[0]
                     
         return trader_state
 
-    def update_counterparty_data(self, trader_state, state: TradingState):
-        """Update counterparty data in trader state."""
+    def update_counterparty_data(self, trader_state, state: TradingState, mids: Dict[str, float]):
+        """Update counterparty data in trader state. Also reports whether any counterparty trade was recorded."""
         if "counterparty_performance" not in trader_state:
             trader_state["counterparty_performance"] = {}
             
+        performance = trader_state["counterparty_performance"]
+        
+        # Register every counterparty trade in order, keeping the ones with a mid price to value
+        valued = []
+        dirty = False
         for product, trades in state.own_trades.items():
+            mid_price = mids.get(product)
             for trade in trades:
                 counterparty = trade.counter_party
                 if not counterparty:
                     continue
+                dirty = True
                     
-                if counterparty not in trader_state["counterparty_performance"]:
-                    trader_state["counterparty_performance"][counterparty] = {}
-                    
-                if product not in trader_state["counterparty_performance"][counterparty]:
-                    trader_state["counterparty_performance"][counterparty][product] = 0.0
+                product_performance = performance.setdefault(counterparty, {})
+                if product not in product_performance:
+                    product_performance[product] = 0.0
                     
-                # Update P&L based on trade
-                mid_price = self.get_mid(product, state)
                 if mid_price:
-                    # Calculate profit/loss based on difference between trade price and mid price
-                    trade_value = trade.quantity * (mid_price - trade.price)
-                    trader_state["counterparty_performance"][counterparty][product] += trade_value
+                    valued.append((product_performance, product, trade.quantity, mid_price, trade.price))
+        
+        # Update P&L based on the difference between trade price and mid price
+        trade_values = [quantity * (mid_price - price) for _, _, quantity, mid_price, price in valued]
+        for (product_performance, product, _, _, _), trade_value in zip(valued, trade_values):
+            product_performance[product] += trade_value
                     
-        return trader_state
+        return trader_state, dirty
         
     def update_preferred_counterparties(self, trader_state):
         """Update preferred counterparties list."""
@@ -156,303 +167,245 @@ class Trader:
         if "counterparty_performance" not in trader_state:
             return trader_state
             
+        # Work on insertion-ordered sets (dict keys) for O(1) membership, then store them back as lists
+        preferred = trader_state["preferred_counterparties"]
+        preferred_sets = {product: dict.fromkeys(names) for product, names in preferred.items()}
         for counterparty, products in trader_state["counterparty_performance"].items():
             for product, performance in products.items():
-                if product not in trader_state["preferred_counterparties"]:
-                    trader_state["preferred_counterparties"][product] = []
+                members = preferred_sets.setdefault(product, {})
                 
                 # Add to preferred list if not already there and performance is good
-                if performance > 0 and counterparty not in trader_state["preferred_counterparties"][product]:
-                    trader_state["preferred_counterparties"][product].append(counterparty)
+                if performance > 0:
+                    members[counterparty] = None
                 
                 # Remove if performance becomes negative
-                elif performance < 0 and counterparty in trader_state["preferred_counterparties"][product]:
-                    trader_state["preferred_counterparties"][product].remove(counterparty)
+                elif performance < 0:
+                    members.pop(counterparty, None)
                     
+        for product, members in preferred_sets.items():
+            preferred[product] = list(members)
         return trader_state
     
     def get_counterparty_trust(self, trader_state, product: str, counterparty: str) -> float:
         """Calculate trust score for a counterparty."""
-        if counterparty not in self.counterparty_profiles:
-            return 1.0  # Default for unknown counterparties
-        
         # Get base trust score from profile
-        trust_score = self.counterparty_profiles[counterparty]["trust_score"]
+        trust_score = self.trust_scores.get(counterparty)
+        if trust_score is None:
+            return 1.0  # Default for unknown counterparties
         
-        # Adjust based on trading history if available
-        if "counterparty_performance" in trader_state and counterparty in trader_state["counterparty_performance"]:
-            if product in trader_state["counterparty_performance"][counterparty]:
-                performance = trader_state["counterparty_performance"][counterparty][product]
-                # Increase trust for profitable counterparties, decrease for unprofitable ones
-                trust_modifier = min(max(performance / 1000, -0.3), 0.3)  # Cap adjustment at ±0.3
-                trust_score += trust_modifier
+        # Adjust based on trading history if available - profitable counterparties gain trust
+        performance = trader_state.get("counterparty_performance", {}).get(counterparty, {}).get(product, 0.0)
         
         # Normalize to a reasonable range
-        return min(max(trust_score, 0.5), 1.5)
+        return _clamp_trust(trust_score, performance)
 
-    def run(self, state: TradingState):
-        print("traderData: " + state.traderData)
-        print("Observations: " + str(state.observations))
+    def trade_basket(self, basket: str, components, quantities, profit_buffer: float, state: TradingState,
+                     mids: Dict[str, float], best_quotes, trust_factors: Dict[str, float]) -> List[Order]:
+        """Arbitrage a basket against the value of its components at their mid prices."""
+        orders: List[Order] = []
+        basket_mid = mids.get(basket)
+        if basket_mid is None:
+            return orders
+        component_mids = [mids.get(component) for component in components]
+        # A missing mid is None, so a genuine mid of zero is not mistaken for one
+        if None in component_mids:
+            return orders
+        best_bid, best_bid_amount, best_ask, best_ask_amount = best_quotes[basket]
+        position = state.position.get(basket, 0)
+        position_limit = self.position_limits[basket]
         
-        # Parse trader state data
-        trader_state = self.get_trader_state(state)
-        
-        # Update state with new data
-        trader_state = self.update_price_history(trader_state, state)
-        trader_state = self.update_counterparty_data(trader_state, state)
-        trader_state = self.update_preferred_counterparties(trader_state)
-        
-        # Analyze counterparties
-        counterparty_analysis = self.analyze_counterparties(state)
+        basket_value = sum(quantity * mid for quantity, mid in zip(quantities, component_mids))
+        spread = basket_mid - basket_value
         
-        # Orders to be placed on exchange matching engine
-        result = {}
-        
-        # Get mid prices for basket components
-        croissant_mid = self.get_mid("CROISSANTS", state)
-        jam_mid = self.get_mid("JAMS", state)
-        djembe_mid = self.get_mid("DJEMBES", state)
-        basket1_mid = self.get_mid("PICNIC_BASKET1", state)
-        basket2_mid = self.get_mid("PICNIC_BASKET2", state)
-        
-        # Profit buffers for arbitrage
-        profit_buffer1 = 1.5
-        profit_buffer2 = 1.5
-        
-        # Process each product
-        for product in state.order_depths:
-            order_depth: OrderDepth = state.order_depths[product]
-            orders: List[Order] = []
-            
-            print("Buy Order depth : " + str(len(order_depth.buy_orders)) + ", Sell order depth : " + str(len(order_depth.sell_orders)))
+        # Determine acceptable price based on arbitrage opportunity
+        if spread > profit_buffer:  # Sell basket (overpriced)
+            acceptable_price = basket_value + profit_buffer
+            if DEBUG:
+                print(f"Acceptable sell price for {basket}: {acceptable_price}")
             
-            # PICNIC_BASKET1 Arbitrage
-            if product == "PICNIC_BASKET1" and all([croissant_mid, jam_mid, djembe_mid, basket1_mid]):
-                basket1_value = (self.basket1_composition["CROISSANTS"] * croissant_mid +
-                                self.basket1_composition["JAMS"] * jam_mid +
-                                self.basket1_composition["DJEMBES"] * djembe_mid)
+            if best_bid is not None and best_bid > acceptable_price:
+                # Adjust volume based on counterparty trust if available
+                adjusted_amount = int(best_bid_amount * trust_factors[basket])
                 
-                spread = basket1_mid - basket1_value
+                # Ensure position limits
+                sell_volume = min(adjusted_amount, position_limit + position)
                 
-                # Determine acceptable price based on arbitrage opportunity
-                if spread > profit_buffer1:  # Sell basket (overpriced)
-                    acceptable_price = basket1_value + profit_buffer1
-                    print("Acceptable sell price for PICNIC_BASKET1: " + str(acceptable_price))
+                if sell_volume > 0:
+                    if DEBUG:
+                        print(f"SELL {basket} {sell_volume}x {best_bid}")
+                    orders.append(Order(basket, best_bid, -sell_volume))
                     
-                    if len(order_depth.buy_orders) != 0:
-                        best_bid = max(order_depth.buy_orders.keys())
-                        best_bid_amount = order_depth.buy_orders[best_bid]
-                        
-                        if best_bid > acceptable_price:
-                            # Adjust volume based on counterparty trust if available
-                            adjusted_amount = best_bid_amount
-                            if "own_trades" in state and "PICNIC_BASKET1" in state.own_trades:
-                                recent_counterparties = [t.counter_party for t in state.own_trades["PICNIC_BASKET1"]]
-                                if recent_counterparties:
-                                    trust_factor = sum(self.get_counterparty_trust(trader_state, "PICNIC_BASKET1", cp) 
-                                                      for cp in recent_counterparties) / len(recent_counterparties)
-                                    adjusted_amount = int(best_bid_amount * trust_factor)
-                            
-                            # Ensure position limits
-                            sell_volume = min(adjusted_amount, self.position_limits["PICNIC_BASKET1"] - 
-                                             abs(state.position.get("PICNIC_BASKET1", 0)))
-                            
-                            if sell_volume > 0:
-                                print("SELL PICNIC_BASKET1", str(sell_volume) + "x", best_bid)
-                                orders.append(Order(product, best_bid, -sell_volume))
-                                
-                elif spread < -profit_buffer1:  # Buy basket (underpriced)
-                    acceptable_price = basket1_value - profit_buffer1
-                    print("Acceptable buy price for PICNIC_BASKET1: " + str(acceptable_price))
-                    
-                    if len(order_depth.sell_orders) != 0:
-                        best_ask = min(order_depth.sell_orders.keys())
-                        best_ask_amount = order_depth.sell_orders[best_ask]
-                        
-                        if best_ask < acceptable_price:
-                            # Adjust volume based on counterparty trust if available
-                            adjusted_amount = best_ask_amount
-                            if "own_trades" in state and "PICNIC_BASKET1" in state.own_trades:
-                                recent_counterparties = [t.counter_party for t in state.own_trades["PICNIC_BASKET1"]]
-                                if recent_counterparties:
-                                    trust_factor = sum(self.get_counterparty_trust(trader_state, "PICNIC_BASKET1", cp) 
-                                                      for cp in recent_counterparties) / len(recent_counterparties)
-                                    adjusted_amount = int(best_ask_amount * trust_factor)
-                            
-                            # Ensure position limits
-                            buy_volume = min(adjusted_amount, self.position_limits["PICNIC_BASKET1"] - 
-                                           abs(state.position.get("PICNIC_BASKET1", 0)))
-                            
-                            if buy_volume > 0:
-                                print("BUY PICNIC_BASKET1", str(buy_volume) + "x", best_ask)
-                                orders.append(Order(product, best_ask, buy_volume))
+        elif spread < -profit_buffer:  # Buy basket (underpriced)
+            acceptable_price = basket_value - profit_buffer
+            if DEBUG:
+                print(f"Acceptable buy price for {basket}: {acceptable_price}")
             
-            # PICNIC_BASKET2 Arbitrage
-            elif product == "PICNIC_BASKET2" and all([croissant_mid, jam_mid, basket2_mid]):
-                basket2_value = (self.basket2_composition["CROISSANTS"] * croissant_mid +
-                                self.basket2_composition["JAMS"] * jam_mid)
+            if best_ask is not None and best_ask < acceptable_price:
+                # Adjust volume based on counterparty trust if available
+                adjusted_amount = int(best_ask_amount * trust_factors[basket])
                 
-                spread = basket2_mid - basket2_value
+                # Ensure position limits
+                buy_volume = min(adjusted_amount, position_limit - position)
                 
-                # Determine acceptable price based on arbitrage opportunity
-                if spread > profit_buffer2:  # Sell basket (overpriced)
-                    acceptable_price = basket2_value + profit_buffer2
-                    print("Acceptable sell price for PICNIC_BASKET2: " + str(acceptable_price))
-                    
-                    if len(order_depth.buy_orders) != 0:
-                        best_bid = max(order_depth.buy_orders.keys())
-                        best_bid_amount = order_depth.buy_orders[best_bid]
-                        
-                        if best_bid > acceptable_price:
-                            # Adjust volume based on counterparty trust if available
-                            adjusted_amount = best_bid_amount
-                            if "own_trades" in state and "PICNIC_BASKET2" in state.own_trades:
-                                recent_counterparties = [t.counter_party for t in state.own_trades["PICNIC_BASKET2"]]
-                                if recent_counterparties:
-                                    trust_factor = sum(self.get_counterparty_trust(trader_state, "PICNIC_BASKET2", cp) 
-                                                      for cp in recent_counterparties) / len(recent_counterparties)
-                                    adjusted_amount = int(best_bid_amount * trust_factor)
-                            
-                            # Ensure position limits
-                            sell_volume = min(adjusted_amount, self.position_limits["PICNIC_BASKET2"] - 
-                                             abs(state.position.get("PICNIC_BASKET2", 0)))
-                            
-                            if sell_volume > 0:
-                                print("SELL PICNIC_BASKET2", str(sell_volume) + "x", best_bid)
-                                orders.append(Order(product, best_bid, -sell_volume))
-                                
-                elif spread < -profit_buffer2:  # Buy basket (underpriced)
-                    acceptable_price = basket2_value - profit_buffer2
-                    print("Acceptable buy price for PICNIC_BASKET2: " + str(acceptable_price))
-                    
-                    if len(order_depth.sell_orders) != 0:
-                        best_ask = min(order_depth.sell_orders.keys())
-                        best_ask_amount = order_depth.sell_orders[best_ask]
-                        
-                        if best_ask < acceptable_price:
-                            # Adjust volume based on counterparty trust if available
-                            adjusted_amount = best_ask_amount
-                            if "own_trades" in state and "PICNIC_BASKET2" in state.own_trades:
-                                recent_counterparties = [t.counter_party for t in state.own_trades["PICNIC_BASKET2"]]
-                                if recent_counterparties:
-                                    trust_factor = sum(self.get_counterparty_trust(trader_state, "PICNIC_BASKET2", cp) 
-                                                      for cp in recent_counterparties) / len(recent_counterparties)
-                                    adjusted_amount = int(best_ask_amount * trust_factor)
-                            
-                            # Ensure position limits
-                            buy_volume = min(adjusted_amount, self.position_limits["PICNIC_BASKET2"] - 
-                                           abs(state.position.get("PICNIC_BASKET2", 0)))
-                            
-                            if buy_volume > 0:
-                                print("BUY PICNIC_BASKET2", str(buy_volume) + "x", best_ask)
-                                orders.append(Order(product, best_ask, buy_volume))
+                if buy_volume > 0:
+                    if DEBUG:
+                        print(f"BUY {basket} {buy_volume}x {best_ask}")
+                    orders.append(Order(basket, best_ask, buy_volume))
+        
+        return orders
+    
+    def trade_component(self, product: str, state: TradingState, mids: Dict[str, float],
+                        best_quotes, trust_factors: Dict[str, float]) -> List[Order]:
+        """Take component quotes more than 2% away from the mid price."""
+        orders: List[Order] = []
+        best_bid, best_bid_amount, best_ask, best_ask_amount = best_quotes[product]
+        position = state.position.get(product, 0)
+        position_limit = self.position_limits[product]
+        
+        # Simple default trading logic
+        acceptable_price = 10  # Default value
+        
+        # Adjust acceptable price based on recent market data
+        mid_price = mids.get(product)
+        if mid_price:
+            acceptable_price = mid_price
+        
+        if DEBUG:
+            print(f"Acceptable price for {product}: {acceptable_price}")
+        
+        # Buy underpriced components
+        if best_ask is not None and best_ask < acceptable_price * 0.98:  # 2% discount
+            # Adjust volume based on counterparty analysis
+            adjusted_amount = int(best_ask_amount * trust_factors[product])
             
-            # Component trading - only when needed for basket arbitrage or when good opportunity exists
-            elif product in ["CROISSANTS", "JAMS", "DJEMBES"]:
-                # Simple default trading logic
-                acceptable_price = 10  # Default value
-                
-                # Adjust acceptable price based on recent market data
-                mid_price = self.get_mid(product, state)
-                if mid_price:
-                    acceptable_price = mid_price
-                
-                print("Acceptable price for " + product + ": " + str(acceptable_price))
-                
-                # Buy underpriced components
-                if len(order_depth.sell_orders) != 0:
-                    best_ask = min(order_depth.sell_orders.keys())
-                    best_ask_amount = order_depth.sell_orders[best_ask]
-                    
-                    if best_ask < acceptable_price * 0.98:  # 2% discount
-                        adjusted_amount = best_ask_amount
-                        
-                        # Adjust volume based on counterparty analysis
-                        if "own_trades" in state and product in state.own_trades:
-                            recent_counterparties = [t.counter_party for t in state.own_trades[product]]
-                            if recent_counterparties:
-                                trust_factor = sum(self.get_counterparty_trust(trader_state, product, cp) 
-                                                  for cp in recent_counterparties) / len(recent_counterparties)
-                                adjusted_amount = int(best_ask_amount * trust_factor)
-                        
-                        # Check position limits
-                        buy_volume = min(adjusted_amount, self.position_limits[product] - 
-                                       abs(state.position.get(product, 0)))
-                        
-                        if buy_volume > 0 and self.within_limits(state, product, buy_volume):
-                            print("BUY " + product, str(buy_volume) + "x", best_ask)
-                            orders.append(Order(product, best_ask, buy_volume))
-                
-                # Sell overpriced components
-                if len(order_depth.buy_orders) != 0:
-                    best_bid = max(order_depth.buy_orders.keys())
-                    best_bid_amount = order_depth.buy_orders[best_bid]
-                    
-                    if best_bid > acceptable_price * 1.02:  # 2% premium
-                        adjusted_amount = best_bid_amount
-                        
-                        # Adjust volume based on counterparty analysis
-                        if "own_trades" in state and product in state.own_trades:
-                            recent_counterparties = [t.counter_party for t in state.own_trades[product]]
-                            if recent_counterparties:
-                                trust_factor = sum(self.get_counterparty_trust(trader_state, product, cp) 
-                                                  for cp in recent_counterparties) / len(recent_counterparties)
-                                adjusted_amount = int(best_bid_amount * trust_factor)
-                        
-                        # Check position limits
-                        sell_volume = min(adjusted_amount, self.position_limits[product] - 
-                                        abs(state.position.get(product, 0)))
-                        
-                        if sell_volume > 0 and self.within_limits(state, product, -sell_volume):
-                            print("SELL " + product, str(sell_volume) + "x", best_bid)
-                            orders.append(Order(product, best_bid, -sell_volume))
+            # Check position limits
+            buy_volume = min(adjusted_amount, position_limit - position)
+            
+            if buy_volume > 0:
+                if DEBUG:
+                    print(f"BUY {product} {buy_volume}x {best_ask}")
+                orders.append(Order(product, best_ask, buy_volume))
+        
+        # Sell overpriced components
+        if best_bid is not None and best_bid > acceptable_price * 1.02:  # 2% premium
+            # Adjust volume based on counterparty analysis
+            adjusted_amount = int(best_bid_amount * trust_factors[product])
+            
+            # Check position limits
+            sell_volume = min(adjusted_amount, position_limit + position)
             
-            # Add orders to result if there are any
+            if sell_volume > 0:
+                if DEBUG:
+                    print(f"SELL {product} {sell_volume}x {best_bid}")
+                orders.append(Order(product, best_bid, -sell_volume))
+        
+        return orders
+
+    def run(self, state: TradingState):
+        if DEBUG:
+            print(f"traderData: {state.traderData}")
+            print(f"Observations: {state.observations}")
+        
+        # Parse trader state data
+        trader_state = self.get_trader_state(state)
+        
+        # Mid prices are fixed for the tick, so compute them once for every consumer below
+        best_quotes = self.get_best_quotes(state)
+        mids = {
+            product: (best_bid + best_ask) / 2 if best_bid is not None and best_ask is not None else None
+            for product, (best_bid, _, best_ask, _) in best_quotes.items()
+        }
+        
+        # Update state with new data
+        trader_state = self.update_price_history(trader_state, mids)
+        trader_state, performance_changed = self.update_counterparty_data(trader_state, state, mids)
+        # Preferred lists only depend on counterparty performance, so they are current on quiet ticks
+        if performance_changed:
+            trader_state = self.update_preferred_counterparties(trader_state)
+        
+        position_limits = self.position_limits
+        get_position = state.position.get
+        
+        # Counterparties on this tick's own trades per product, read once for the trust and momentum logic
+        recent_counterparties_by_product = {
+            product: [trade.counter_party for trade in trades]
+            for product, trades in state.own_trades.items()
+        }
+        
+        # Average trust in this tick's counterparties per product, shared by every branch below
+        trust_factors = {}
+        for product in position_limits:
+            recent_counterparties = recent_counterparties_by_product.get(product, [])
+            if recent_counterparties:
+                # Score each distinct counterparty once, however many trades it was on
+                trust = {cp: self.get_counterparty_trust(trader_state, product, cp)
+                         for cp in set(recent_counterparties)}
+                trust_factors[product] = sum(trust[cp] for cp in recent_counterparties) / len(recent_counterparties)
+            else:
+                trust_factors[product] = 1.0
+        
+        # Orders to be placed on exchange matching engine
+        result = {}
+        
+        if DEBUG:
+            for order_depth in state.order_depths.values():
+                print(f"Buy Order depth : {len(order_depth.buy_orders)}, Sell order depth : {len(order_depth.sell_orders)}")
+        
+        # Basket arbitrage against the summed component mids, using the shared base profit buffer
+        for basket, components, quantities in self.basket_legs:
+            orders = self.trade_basket(basket, components, quantities, self.base_profit_buffer,
+                                       state, mids, best_quotes, trust_factors)
+            if orders:
+                result[basket] = orders
+        
+        # Component trading - only when needed for basket arbitrage or when good opportunity exists
+        for product in ("CROISSANTS", "JAMS", "DJEMBES"):
+            if product not in best_quotes:
+                continue
+            orders = self.trade_component(product, state, mids, best_quotes, trust_factors)
             if orders:
                 result[product] = orders
         
         # Special trading strategies for known counterparty behaviors
-        for product in self.position_limits:
-            if product in state.own_trades and state.own_trades[product]:
-                # Get recent counterparties
-                counterparties = [trade.counter_party for trade in state.own_trades[product] if trade.counter_party]
+        # Products a momentum trader (beetle) hit us on this tick, and the short-term trend per product
+        strategies = self.strategies
+        momentum_products = {
+            product for product, counterparties in recent_counterparties_by_product.items()
+            for counterparty in counterparties if strategies.get(counterparty) == "momentum"
+        }
+        if momentum_products:
+            trends = {
+                product: history[-1] - history[-3]
+                for product, history in trader_state["price_history"].items() if len(history) >= 3
+            }
+            for product in position_limits:
+                if product not in momentum_products:
+                    continue
+                trend = trends.get(product)
                 
-                for counterparty in set(counterparties):
-                    if counterparty in self.counterparty_profiles:
-                        # Check for momentum traders (beetles)
-                        if self.counterparty_profiles[counterparty]["strategy"] == "momentum":
-                            if product in trader_state["price_history"] and len(trader_state["price_history"][product]) >= 3:
-                                trend = trader_state["price_history"][product][-1] - trader_state["price_history"][product][-3]
-                                
-                                # If trend is strong, place orders ahead of momentum traders
-                                if abs(trend) > 1.0 and product in state.order_depths:
-                                    order_depth = state.order_depths[product]
-                                    
-                                    # In uptrend, place early buy orders
-                                    if trend > 0 and order_depth.sell_orders:
-                                        best_ask = min(order_depth.sell_orders.keys())
-                                        volume = min(5, self.position_limits[product] - abs(state.position.get(product, 0)))
-                                        
-                                        if product not in result:
-                                            result[product] = []
-                                        result[product].append(Order(product, best_ask, volume))
-                                        print(f"MOMENTUM STRATEGY: BUY {product} {volume}x {best_ask}")
-                                    
-                                    # In downtrend, place early sell orders
-                                    elif trend < 0 and order_depth.buy_orders:
-                                        best_bid = max(order_depth.buy_orders.keys())
-                                        volume = min(5, self.position_limits[product] - abs(state.position.get(product, 0)))
-                                        
-                                        if product not in result:
-                                            result[product] = []
-                                        result[product].append(Order(product, best_bid, -volume))
-                                        print(f"MOMENTUM STRATEGY: SELL {product} {volume}x {best_bid}")
+                # If trend is strong, place orders ahead of momentum traders
+                if trend is not None and abs(trend) > 1.0 and product in best_quotes:
+                    best_bid, _, best_ask, _ = best_quotes[product]
+                    
+                    # In uptrend, place early buy orders
+                    if trend > 0 and best_ask is not None:
+                        volume = min(5, position_limits[product] - get_position(product, 0))
+                        result.setdefault(product, []).append(Order(product, best_ask, volume))
+                        if DEBUG:
+                            print(f"MOMENTUM STRATEGY: BUY {product} {volume}x {best_ask}")
+                    
+                    # In downtrend, place early sell orders
+                    elif trend < 0 and best_bid is not None:
+                        volume = min(5, position_limits[product] + get_position(product, 0))
+                        result.setdefault(product, []).append(Order(product, best_bid, -volume))
+                        if DEBUG:
+                            print(f"MOMENTUM STRATEGY: SELL {product} {volume}x {best_bid}")
         
         # String value holding Trader state data required.
         # Convert trader_state to JSON string for persistence
-        traderData = json.dumps(trader_state)
+        traderData = _dumps(trader_state)
         
         # No conversions in this example
         conversions = 0
         
-        return result, conversions, traderData
\ No newline at end of file
+        return result, conversions, traderData
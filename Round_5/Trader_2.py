@@ -21,13 +21,20 @@ class Trader:
         # Orders to be placed
         result = {}
 
+        # Top of book and mid-price per product, shared by the order logic and the state update
+        best_quotes = self.get_best_quotes(state)
+        mids = {
+            product: (best_bid + best_ask) / 2 if best_bid is not None and best_ask is not None else None
+            for product, (best_bid, _, best_ask, _) in best_quotes.items()
+        }
+
         # Process each product in the order book
         for product in state.order_depths:
             order_depth: OrderDepth = state.order_depths[product]
             orders: List[Order] = []
 
             # Calculate mid-price from current order depth
-            mid_price = self.get_mid_price(order_depth)
+            mid_price = mids[product]
             if mid_price is None:
                 print(f"No valid mid-price for {product}, skipping.")
                 continue
@@ -40,37 +47,42 @@ class Trader:
             print(f"Acceptable price for {product}: {acceptable_price}")
             print(f"Buy Order depth: {len(order_depth.buy_orders)}, Sell order depth: {len(order_depth.sell_orders)}")
 
+            # Both sides are quoted, since the mid-price exists
+            best_bid, best_bid_amount, best_ask, best_ask_amount = best_quotes[product]
+
             # Check sell orders (buy opportunity)
-            if len(order_depth.sell_orders) > 0:
-                best_ask, best_ask_amount = min(order_depth.sell_orders.items())
-                if best_ask < acceptable_price:
-                    print(f"BUY {product}, {str(-best_ask_amount)}x {best_ask}")
-                    orders.append(Order(product, best_ask, -best_ask_amount))
+            if best_ask < acceptable_price:
+                print(f"BUY {product}, {str(-best_ask_amount)}x {best_ask}")
+                orders.append(Order(product, best_ask, -best_ask_amount))
 
             # Check buy orders (sell opportunity)
-            if len(order_depth.buy_orders) > 0:
-                best_bid, best_bid_amount = max(order_depth.buy_orders.items())
-                if best_bid > acceptable_price:
-                    print(f"SELL {product}, {str(best_bid_amount)}x {best_bid}")
-                    orders.append(Order(product, best_bid, -best_bid_amount))
+            if best_bid > acceptable_price:
+                print(f"SELL {product}, {str(best_bid_amount)}x {best_bid}")
+                orders.append(Order(product, best_bid, -best_bid_amount))
 
             result[product] = orders
 
         # Update state with new trade data
-        self.update_state(state)
+        self.update_state(state, mids)
 
         # Serialize state for next iteration
         traderData = json.dumps(self.state)
         conversions = 1  # Sample conversion request
         return result, conversions, traderData
 
-    def get_mid_price(self, order_depth: OrderDepth) -> float:
-        """Calculate the mid-price from the order depth."""
-        if order_depth.buy_orders and order_depth.sell_orders:
-            best_bid = max(order_depth.buy_orders.keys())
-            best_ask = min(order_depth.sell_orders.keys())
-            return (best_bid + best_ask) / 2
-        return None
+    def get_best_quotes(self, state: TradingState):
+        """Best bid, bid volume, best ask and ask volume per product, scanned once per tick."""
+        best_quotes = {}
+        for product, order_depth in state.order_depths.items():
+            best_bid = max(order_depth.buy_orders) if order_depth.buy_orders else None
+            best_ask = min(order_depth.sell_orders) if order_depth.sell_orders else None
+            best_quotes[product] = (
+                best_bid,
+                order_depth.buy_orders[best_bid] if best_bid is not None else 0,
+                best_ask,
+                order_depth.sell_orders[best_ask] if best_ask is not None else 0
+            )
+        return best_quotes
 
     def calculate_acceptable_price(self, product: str, current_mid_price: float) -> float:
         """Calculate acceptable price based on historical trades with counterparties."""
@@ -93,7 +105,7 @@ class Trader:
             return weighted_price / total_weight
         return None  # No historical data, return None to use mid-price as fallback
 
-    def update_state(self, state: TradingState):
+    def update_state(self, state: TradingState, mids):
         """Update the state with new trade data using EWMA."""
         alpha = 0.1  # Smoothing factor for EWMA
 
@@ -102,7 +114,7 @@ class Trader:
                 counterparty = trade.counter_party
                 price = trade.price
                 quantity = trade.quantity
-                mid_price = self.get_mid_price(state.order_depths[product])
+                mid_price = mids.get(product)
 
                 if mid_price is None:
                     continue  # Skip if no valid mid-price
@@ -1,35 +1,135 @@
-import json
 from datamodel import OrderDepth, UserId, TradingState, Order
-from typing import List
+from typing import Dict, List
 import string
 
+class CpState:
+    """EWMA trade price and profit per unit for one counterparty on one product."""
+    __slots__ = ("price", "profit")
+
+    def __init__(self, price, profit):
+        self.price = price
+        self.profit = profit
+
+def _cp_state_fields(obj):
+    """Serialize a CpState as the {'price', 'profit'} mapping traderData has always used."""
+    if isinstance(obj, CpState):
+        return {'price': obj.price, 'profit': obj.profit}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+try:
+    import orjson
+    
+    def _loads(data):
+        return orjson.loads(data)
+    
+    def _dumps(obj):
+        # Trades without a counterparty key the state by None, which the stdlib encoder writes as "null"
+        return orjson.dumps(obj, default=_cp_state_fields, option=orjson.OPT_NON_STR_KEYS).decode()
+except ImportError:
+    import json
+    
+    def _loads(data):
+        return json.loads(data)
+    
+    def _dumps(obj):
+        return json.dumps(obj, separators=(",", ":"), default=_cp_state_fields)
+
+try:
+    import numpy as np
+    from numba import njit
+    NUMBA_AVAILABLE = True
+    
+    def _as_array(values):
+        return np.asarray(values, dtype=np.float64)
+    
+    def _as_index_array(values):
+        return np.asarray(values, dtype=np.int64)
+except ImportError:
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+    NUMBA_AVAILABLE = False
+    
+    def _as_array(values):
+        return values
+    
+    def _as_index_array(values):
+        return values
+
+@njit
+def _ewma_update(prices, quantities, slots, mid_price, alpha, ewma_prices, ewma_profits, seeded):
+    """Fold one product's trades, in order, into per-counterparty EWMA price and profit slots.
+    Slots not yet seeded take the first trade's price and profit as they are."""
+    for i in range(len(prices)):
+        price = prices[i]
+        if quantities[i] > 0:  # We bought
+            profit_per_unit = mid_price - price
+        else:  # We sold
+            profit_per_unit = price - mid_price
+        slot = slots[i]
+        if seeded[slot]:
+            ewma_prices[slot] = alpha * price + (1 - alpha) * ewma_prices[slot]
+            ewma_profits[slot] = alpha * profit_per_unit + (1 - alpha) * ewma_profits[slot]
+        else:
+            ewma_prices[slot] = price
+            ewma_profits[slot] = profit_per_unit
+            seeded[slot] = 1
+    return ewma_prices, ewma_profits
+
+if NUMBA_AVAILABLE:
+    _ewma_update(
+        _as_array([100.0, 101.0]), _as_array([1.0, -1.0]), _as_index_array([0, 0]), 100.5, 0.1,
+        _as_array([0.0]), _as_array([0.0]), _as_array([0.0])
+    )
+
+# Printing every product on every tick slows backtests down; switch on for local debugging
+DEBUG = False
+
 class Trader:
     def __init__(self):
         # Initialize state to store historical trade data
         self.state = {}
+        # traderData this instance returned last tick, so an unchanged string need not be parsed again
+        self._trader_data_json = None
+        # Per-product lists of the state's EWMA entries, in state order; rebuilt when a pair is added
+        self._entries_by_product = None
 
     def run(self, state: TradingState):
-        # Deserialize previous state from traderData
-        if state.traderData:
-            self.state = json.loads(state.traderData)
-        else:
+        # Deserialize previous state from traderData, unless it is the state this instance already holds
+        if not state.traderData:
             self.state = {}
+            self._entries_by_product = None
+        elif state.traderData != self._trader_data_json:
+            self.state = {
+                counterparty: {product: CpState(entry['price'], entry['profit']) for product, entry in products.items()}
+                for counterparty, products in _loads(state.traderData).items()
+            }
+            self._entries_by_product = None
 
-        print("traderData: " + state.traderData)
-        print("Observations: " + str(state.observations))
+        if DEBUG:
+            print(f"traderData: {state.traderData}")
+            print(f"Observations: {state.observations}")
 
         # Orders to be placed
         result = {}
 
+        # Top of book and mid-price per product, shared by the order logic and the state update
+        best_quotes = self.get_best_quotes(state)
+        mids = {
+            product: (best_bid + best_ask) / 2 if best_bid is not None and best_ask is not None else None
+            for product, (best_bid, _, best_ask, _) in best_quotes.items()
+        }
+
         # Process each product in the order book
         for product in state.order_depths:
-            order_depth: OrderDepth = state.order_depths[product]
             orders: List[Order] = []
 
             # Calculate mid-price from current order depth
-            mid_price = self.get_mid_price(order_depth)
+            mid_price = mids[product]
             if mid_price is None:
-                print(f"No valid mid-price for {product}, skipping.")
+                if DEBUG:
+                    print(f"No valid mid-price for {product}, skipping.")
                 continue
 
             # Calculate acceptable price based on historical trades
@@ -37,92 +137,121 @@ class Trader:
             if acceptable_price is None:
                 acceptable_price = mid_price  # Fallback to mid-price if no historical data
 
-            print(f"Acceptable price for {product}: {acceptable_price}")
-            print(f"Buy Order depth: {len(order_depth.buy_orders)}, Sell order depth: {len(order_depth.sell_orders)}")
+            if DEBUG:
+                order_depth: OrderDepth = state.order_depths[product]
+                print(f"Acceptable price for {product}: {acceptable_price}")
+                print(f"Buy Order depth: {len(order_depth.buy_orders)}, Sell order depth: {len(order_depth.sell_orders)}")
+
+            # Both sides are quoted, since the mid-price exists
+            best_bid, best_bid_amount, best_ask, best_ask_amount = best_quotes[product]
 
             # Check sell orders (buy opportunity)
-            if len(order_depth.sell_orders) > 0:
-                best_ask, best_ask_amount = min(order_depth.sell_orders.items())
-                if best_ask < acceptable_price:
-                    print(f"BUY {product}, {str(-best_ask_amount)}x {best_ask}")
-                    orders.append(Order(product, best_ask, -best_ask_amount))
+            if best_ask < acceptable_price:
+                if DEBUG:
+                    print(f"BUY {product}, {-best_ask_amount}x {best_ask}")
+                orders.append(Order(product, best_ask, -best_ask_amount))
 
             # Check buy orders (sell opportunity)
-            if len(order_depth.buy_orders) > 0:
-                best_bid, best_bid_amount = max(order_depth.buy_orders.items())
-                if best_bid > acceptable_price:
-                    print(f"SELL {product}, {str(best_bid_amount)}x {best_bid}")
-                    orders.append(Order(product, best_bid, -best_bid_amount))
+            if best_bid > acceptable_price:
+                if DEBUG:
+                    print(f"SELL {product}, {best_bid_amount}x {best_bid}")
+                orders.append(Order(product, best_bid, -best_bid_amount))
 
             result[product] = orders
 
         # Update state with new trade data
-        self.update_state(state)
+        self.update_state(state, mids)
 
         # Serialize state for next iteration
-        traderData = json.dumps(self.state)
+        traderData = _dumps(self.state)
+        self._trader_data_json = traderData
         conversions = 1  # Sample conversion request
         return result, conversions, traderData
 
-    def get_mid_price(self, order_depth: OrderDepth) -> float:
-        """Calculate the mid-price from the order depth."""
-        if order_depth.buy_orders and order_depth.sell_orders:
-            best_bid = max(order_depth.buy_orders.keys())
-            best_ask = min(order_depth.sell_orders.keys())
-            return (best_bid + best_ask) / 2
-        return None
+    def get_best_quotes(self, state: TradingState):
+        """Best bid, bid volume, best ask and ask volume per product, scanned once per tick."""
+        best_quotes = {}
+        for product, order_depth in state.order_depths.items():
+            best_bid = max(order_depth.buy_orders) if order_depth.buy_orders else None
+            best_ask = min(order_depth.sell_orders) if order_depth.sell_orders else None
+            best_quotes[product] = (
+                best_bid,
+                order_depth.buy_orders[best_bid] if best_bid is not None else 0,
+                best_ask,
+                order_depth.sell_orders[best_ask] if best_ask is not None else 0
+            )
+        return best_quotes
+
+    def get_entries_by_product(self):
+        """EWMA entries of every counterparty that traded each product, shared with self.state."""
+        if self._entries_by_product is None:
+            entries_by_product = {}
+            for products in self.state.values():
+                for product, entry in products.items():
+                    entries_by_product.setdefault(product, []).append(entry)
+            self._entries_by_product = entries_by_product
+        return self._entries_by_product
 
     def calculate_acceptable_price(self, product: str, current_mid_price: float) -> float:
         """Calculate acceptable price based on historical trades with counterparties."""
-        total_weight = 0
-        weighted_price = 0
+        entries = self.get_entries_by_product().get(product)
+        if not entries:
+            return None  # No historical data, return None to use mid-price as fallback
         k = 0.5  # Profitability adjustment factor
 
-        for counterparty in self.state:
-            if product in self.state[counterparty]:
-                # Use equal weights for simplicity; could use trade frequency instead
-                weight = 1
-                ewma_price = self.state[counterparty][product].get('price', current_mid_price)
-                ewma_profit = self.state[counterparty][product].get('profit', 0)
-                adjustment = k * ewma_profit
-                adjusted_price = ewma_price + adjustment
-                weighted_price += weight * adjusted_price
-                total_weight += weight
-
-        if total_weight > 0:
-            return weighted_price / total_weight
-        return None  # No historical data, return None to use mid-price as fallback
-
-    def update_state(self, state: TradingState):
+        # Counterparties are weighted equally; could use trade frequency instead
+        weighted_price = 0
+        for entry in entries:
+            weighted_price += entry.price + k * entry.profit
+        return weighted_price / len(entries)
+
+    def update_state(self, state: TradingState, mids: Dict[str, float]):
         """Update the state with new trade data using EWMA."""
         alpha = 0.1  # Smoothing factor for EWMA
 
-        for product in state.own_trades:
-            for trade in state.own_trades[product]:
-                counterparty = trade.counter_party
-                price = trade.price
-                quantity = trade.quantity
-                mid_price = self.get_mid_price(state.order_depths[product])
-
-                if mid_price is None:
-                    continue  # Skip if no valid mid-price
-
-                # Calculate profit per unit
-                if quantity > 0:  # We bought
-                    profit_per_unit = mid_price - price
-                else:  # We sold
-                    profit_per_unit = price - mid_price
-
-                # Initialize state for new counterparty or product
-                if counterparty not in self.state:
-                    self.state[counterparty] = {}
-                if product not in self.state[counterparty]:
-                    self.state[counterparty][product] = {'price': price, 'profit': profit_per_unit}
+        for product, trades in state.own_trades.items():
+            if not trades:
+                continue
+            # The book is fixed for the tick, so every trade on the product is valued against one mid
+            mid_price = mids.get(product)
+            if mid_price is None:
+                continue  # Skip if no valid mid-price
+
+            # One slot per counterparty, seeded from its current EWMA entry for the product if it has one
+            slot_of = {}
+            ewma_prices, ewma_profits, seeded, slots = [], [], [], []
+            for trade in trades:
+                slot = slot_of.get(trade.counter_party)
+                if slot is None:
+                    slot = slot_of[trade.counter_party] = len(ewma_prices)
+                    entry = self.state.get(trade.counter_party, {}).get(product)
+                    if entry is None:
+                        ewma_prices.append(0)
+                        ewma_profits.append(0)
+                        seeded.append(0)
+                    else:
+                        ewma_prices.append(entry.price)
+                        ewma_profits.append(entry.profit)
+                        seeded.append(1)
+                slots.append(slot)
+
+            ewma_prices, ewma_profits = _ewma_update(
+                _as_array([trade.price for trade in trades]),
+                _as_array([trade.quantity for trade in trades]),
+                _as_index_array(slots),
+                mid_price, alpha,
+                _as_array(ewma_prices), _as_array(ewma_profits), _as_array(seeded)
+            )
+            if NUMBA_AVAILABLE:
+                ewma_prices, ewma_profits = ewma_prices.tolist(), ewma_profits.tolist()
+
+            # Initialize state for new counterparty or product, otherwise store the updated EWMAs
+            for counterparty, slot in slot_of.items():
+                products = self.state.setdefault(counterparty, {})
+                entry = products.get(product)
+                if entry is None:
+                    products[product] = CpState(ewma_prices[slot], ewma_profits[slot])
+                    self._entries_by_product = None
                 else:
-                    # Update EWMA for price and profit
-                    old_price = self.state[counterparty][product]['price']
-                    old_profit = self.state[counterparty][product]['profit']
-                    new_price = alpha * price + (1 - alpha) * old_price
-                    new_profit = alpha * profit_per_unit + (1 - alpha) * old_profit
-                    self.state[counterparty][product]['price'] = new_price
-                    self.state[counterparty][product]['profit'] = new_profit
\ No newline at end of file
+                    entry.price = ewma_prices[slot]
+                    entry.profit = ewma_profits[slot]
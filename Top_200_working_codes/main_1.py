@@ -1,6 +1,42 @@
 from typing import Dict, List
 from datamodel import Order, OrderDepth, TradingState
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+    NUMBA_AVAILABLE = False
+
+# Basket decisions returned by _basket_decision
+HOLD, SELL_BASKET, BUY_BASKET = 0, 1, -1
+
+@njit
+def _basket_decision(basket_mid, croissant_mid, jam_mid, djembe_mid, croissants, jams, djembes, profit_buffer):
+    """Value a basket at its component mids and decide whether it is rich (sell), cheap (buy) or fair."""
+    basket_value = croissants * croissant_mid + jams * jam_mid + djembes * djembe_mid
+    if basket_mid > basket_value + profit_buffer:
+        return SELL_BASKET
+    if basket_mid < basket_value - profit_buffer:
+        return BUY_BASKET
+    return HOLD
+
+if NUMBA_AVAILABLE:
+    _basket_decision(100.0, 10.0, 10.0, 10.0, 6, 3, 1, 3)
+
+def _top_of_book(order_depth: OrderDepth):
+    """(best_bid, bid_volume, best_ask, ask_volume) for a two-sided book, else None."""
+    bids = order_depth.buy_orders
+    asks = order_depth.sell_orders
+    if not bids or not asks:
+        return None
+    best_bid = max(bids)
+    best_ask = min(asks)
+    return best_bid, bids[best_bid], best_ask, asks[best_ask]
+
 class Trader:
     def __init__(self):
         self.position_limits = {
@@ -13,104 +49,78 @@ class Trader:
         self.profit_buffer = 3  # Reduced from 5
         self.basket1_composition = {"CROISSANTS": 6, "JAMS": 3, "DJEMBES": 1}
         self.basket2_composition = {"CROISSANTS": 4, "JAMS": 2}
+        # (basket, component items, croissant/jam/djembe quantities) baked once for the per-tick arbitrage
+        self._arb_configs = tuple(
+            (basket, tuple(composition.items()),
+             (composition.get("CROISSANTS", 0), composition.get("JAMS", 0), composition.get("DJEMBES", 0)))
+            for basket, composition in (("PICNIC_BASKET1", self.basket1_composition),
+                                        ("PICNIC_BASKET2", self.basket2_composition))
+        )
 
-    def get_mid(self, product: str, state: TradingState) -> float:
-        if product not in state.order_depths:
-            return None
-        bids = state.order_depths[product].buy_orders
-        asks = state.order_depths[product].sell_orders
-        if bids and asks:
-            return (max(bids.keys()) + min(asks.keys())) / 2
-        return None
+    def _try_arb(self, orders: Dict[str, List[Order]], basket: str, comp_items, decision: int, tops, positions, room):
+        """Trade a basket against its components in the direction _basket_decision chose."""
+        position_limit = self.position_limits[basket]
+        if decision == SELL_BASKET:
+            # Basket overpriced: Sell basket, buy components
+            if room[basket][1] > 0:
+                best_bid, best_bid_volume, _, _ = tops[basket]
+                volume = min(best_bid_volume, position_limit - abs(positions[basket]))
+                if volume > 0:
+                    orders[basket] = [Order(basket, best_bid, -volume)]
+                    # Buy components
+                    for product, qty in comp_items:
+                        if volume * qty <= room[product][0]:
+                            _, _, best_ask, best_ask_volume = tops[product]
+                            avail_volume = min(best_ask_volume, volume * qty)
+                            if avail_volume > 0:
+                                orders.setdefault(product, []).append(Order(product, best_ask, avail_volume))
 
-    def within_limits(self, state: TradingState, product: str, qty: int) -> bool:
-        current_position = state.position.get(product, 0)
-        new_position = current_position + qty
-        return abs(new_position) <= self.position_limits[product]
+        elif decision == BUY_BASKET:
+            # Basket underpriced: Buy basket, sell components
+            if room[basket][0] > 0:
+                _, _, best_ask, best_ask_volume = tops[basket]
+                volume = min(best_ask_volume, position_limit - abs(positions[basket]))
+                if volume > 0:
+                    orders[basket] = [Order(basket, best_ask, volume)]
+                    # Sell components
+                    for product, qty in comp_items:
+                        if volume * qty <= room[product][1]:
+                            best_bid, best_bid_volume, _, _ = tops[product]
+                            avail_volume = min(best_bid_volume, volume * qty)
+                            if avail_volume > 0:
+                                orders.setdefault(product, []).append(Order(product, best_bid, -avail_volume))
 
     def run(self, state: TradingState) -> tuple[Dict[str, List[Order]], int, str]:
         orders: Dict[str, List[Order]] = {}
 
-        # Get mid prices
-        croissant_mid = self.get_mid("CROISSANTS", state)
-        jam_mid = self.get_mid("JAMS", state)
-        djembe_mid = self.get_mid("DJEMBES", state)
-        basket1_mid = self.get_mid("PICNIC_BASKET1", state)
-        basket2_mid = self.get_mid("PICNIC_BASKET2", state)
-
-        # PICNIC_BASKET1 Arbitrage
-        if all([croissant_mid, jam_mid, djembe_mid, basket1_mid]):
-            basket1_value = (self.basket1_composition["CROISSANTS"] * croissant_mid +
-                             self.basket1_composition["JAMS"] * jam_mid +
-                             self.basket1_composition["DJEMBES"] * djembe_mid)
-
-            if basket1_mid > basket1_value + self.profit_buffer:
-                # Basket overpriced: Sell basket, buy components
-                if self.within_limits(state, "PICNIC_BASKET1", -1):
-                    best_bid = max(state.order_depths["PICNIC_BASKET1"].buy_orders.keys())
-                    volume = min(state.order_depths["PICNIC_BASKET1"].buy_orders[best_bid], 
-                               self.position_limits["PICNIC_BASKET1"] - abs(state.position.get("PICNIC_BASKET1", 0)))
-                    if volume > 0:
-                        orders["PICNIC_BASKET1"] = [Order("PICNIC_BASKET1", best_bid, -volume)]
-                        # Buy components
-                        for product, qty in self.basket1_composition.items():
-                            if self.within_limits(state, product, volume * qty):
-                                best_ask = min(state.order_depths[product].sell_orders.keys())
-                                avail_volume = min(state.order_depths[product].sell_orders[best_ask], volume * qty)
-                                if avail_volume > 0:
-                                    orders[product] = orders.get(product, []) + [Order(product, best_ask, avail_volume)]
+        # Top of book and position per product, read once and shared by every leg below
+        tops = {}
+        for product in self.position_limits:
+            if product in state.order_depths:
+                top = _top_of_book(state.order_depths[product])
+                if top is not None:
+                    tops[product] = top
+        positions = {product: state.position.get(product, 0) for product in self.position_limits}
+        position_limits = self.position_limits
+        # (buy room, sell room) left under each limit, so a limit check is one compare
+        room = {product: (limit - positions[product], limit + positions[product])
+                for product, limit in position_limits.items()}
+        profit_buffer = self.profit_buffer
 
-            elif basket1_mid < basket1_value - self.profit_buffer:
-                # Basket underpriced: Buy basket, sell components
-                if self.within_limits(state, "PICNIC_BASKET1", 1):
-                    best_ask = min(state.order_depths["PICNIC_BASKET1"].sell_orders.keys())
-                    volume = min(state.order_depths["PICNIC_BASKET1"].sell_orders[best_ask],
-                               self.position_limits["PICNIC_BASKET1"] - abs(state.position.get("PICNIC_BASKET1", 0)))
-                    if volume > 0:
-                        orders["PICNIC_BASKET1"] = [Order("PICNIC_BASKET1", best_ask, volume)]
-                        # Sell components
-                        for product, qty in self.basket1_composition.items():
-                            if self.within_limits(state, product, -volume * qty):
-                                best_bid = max(state.order_depths[product].buy_orders.keys())
-                                avail_volume = min(state.order_depths[product].buy_orders[best_bid], volume * qty)
-                                if avail_volume > 0:
-                                    orders[product] = orders.get(product, []) + [Order(product, best_bid, -avail_volume)]
-
-        # PICNIC_BASKET2 Arbitrage
-        if all([croissant_mid, jam_mid, basket2_mid]):
-            basket2_value = (self.basket2_composition["CROISSANTS"] * croissant_mid +
-                             self.basket2_composition["JAMS"] * jam_mid)
-
-            if basket2_mid > basket2_value + self.profit_buffer:
-                # Basket overpriced: Sell basket, buy components
-                if self.within_limits(state, "PICNIC_BASKET2", -1):
-                    best_bid = max(state.order_depths["PICNIC_BASKET2"].buy_orders.keys())
-                    volume = min(state.order_depths["PICNIC_BASKET2"].buy_orders[best_bid],
-                               self.position_limits["PICNIC_BASKET2"] - abs(state.position.get("PICNIC_BASKET2", 0)))
-                    if volume > 0:
-                        orders["PICNIC_BASKET2"] = [Order("PICNIC_BASKET2", best_bid, -volume)]
-                        # Buy components
-                        for product, qty in self.basket2_composition.items():
-                            if self.within_limits(state, product, volume * qty):
-                                best_ask = min(state.order_depths[product].sell_orders.keys())
-                                avail_volume = min(state.order_depths[product].sell_orders[best_ask], volume * qty)
-                                if avail_volume > 0:
-                                    orders[product] = orders.get(product, []) + [Order(product, best_ask, avail_volume)]
+        # Get mid prices
+        mids = {product: (top[0] + top[2]) / 2 for product, top in tops.items()}
+        croissant_mid = mids.get("CROISSANTS")
+        jam_mid = mids.get("JAMS")
+        djembe_mid = mids.get("DJEMBES")
 
-            elif basket2_mid < basket2_value - self.profit_buffer:
-                # Basket underpriced: Buy basket, sell components
-                if self.within_limits(state, "PICNIC_BASKET2", 1):
-                    best_ask = min(state.order_depths["PICNIC_BASKET2"].sell_orders.keys())
-                    volume = min(state.order_depths["PICNIC_BASKET2"].sell_orders[best_ask],
-                               self.position_limits["PICNIC_BASKET2"] - abs(state.position.get("PICNIC_BASKET2", 0)))
-                    if volume > 0:
-                        orders["PICNIC_BASKET2"] = [Order("PICNIC_BASKET2", best_ask, volume)]
-                        # Sell components
-                        for product, qty in self.basket2_composition.items():
-                            if self.within_limits(state, product, -volume * qty):
-                                best_bid = max(state.order_depths[product].buy_orders.keys())
-                                avail_volume = min(state.order_depths[product].buy_orders[best_bid], volume * qty)
-                                if avail_volume > 0:
-                                    orders[product] = orders.get(product, []) + [Order(product, best_bid, -avail_volume)]
+        # Basket arbitrage, one pass per basket with its own composition
+        for basket, comp_items, (croissants, jams, djembes) in self._arb_configs:
+            basket_mid = mids.get(basket)
+            if basket_mid is None or croissant_mid is None or jam_mid is None or (djembes and djembe_mid is None):
+                continue
+            decision = _basket_decision(basket_mid, croissant_mid, jam_mid, djembe_mid if djembes else 0.0,
+                                        croissants, jams, djembes, profit_buffer)
+            if decision != HOLD:
+                self._try_arb(orders, basket, comp_items, decision, tops, positions, room)
 
-        return orders, 0, "ENHANCED_ARBITRAGE"
\ No newline at end of file
+        return orders, 0, "ENHANCED_ARBITRAGE"
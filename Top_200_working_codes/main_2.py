@@ -1,6 +1,45 @@
 from typing import Dict, List
 from datamodel import Order, OrderDepth, TradingState
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+    NUMBA_AVAILABLE = False
+
+# Basket decisions returned by _basket_decision
+HOLD, SELL_BASKET, BUY_BASKET, UNWIND = 0, 1, -1, 2
+
+@njit
+def _basket_decision(basket_mid, croissant_mid, jam_mid, djembe_mid, croissants, jams, djembes, profit_buffer):
+    """(decision, spread) for a basket valued at its component mids. Inside half the buffer
+    the basket is fairly priced, so positions are unwound instead of traded."""
+    spread = basket_mid - (croissants * croissant_mid + jams * jam_mid + djembes * djembe_mid)
+    if abs(spread) < profit_buffer / 2:
+        return UNWIND, spread
+    if spread > profit_buffer:
+        return SELL_BASKET, spread
+    if spread < -profit_buffer:
+        return BUY_BASKET, spread
+    return HOLD, spread
+
+if NUMBA_AVAILABLE:
+    _basket_decision(100.0, 10.0, 10.0, 10.0, 6, 3, 1, 1.5)
+
+def _top_of_book(order_depth: OrderDepth):
+    """(best_bid, bid_volume, best_ask, ask_volume) for a two-sided book, else None."""
+    bids = order_depth.buy_orders
+    asks = order_depth.sell_orders
+    if not bids or not asks:
+        return None
+    best_bid = max(bids)
+    best_ask = min(asks)
+    return best_bid, bids[best_bid], best_ask, asks[best_ask]
+
 class Trader:
     def __init__(self):
         self.position_limits = {
@@ -10,73 +49,59 @@ class Trader:
         self.base_profit_buffer = 1.5  # Lowered from 2.0
         self.basket1_composition = {"CROISSANTS": 6, "JAMS": 3, "DJEMBES": 1}
         self.basket2_composition = {"CROISSANTS": 4, "JAMS": 2}
-        self.price_history = {product: [] for product in self.position_limits.keys()}
-        self.max_history = 5
+        # Composition items cached once for the per-tick component legs
+        self._b1_items = list(self.basket1_composition.items())
+        self._b2_items = list(self.basket2_composition.items())
+        # Volatility is an EWMA of absolute tick-to-tick mid moves, so only the last mid is kept
+        self.volatility_alpha = 0.2
+        self._vol_ewma = {product: 1.0 for product in self.position_limits.keys()}
+        self._last_mid = {product: None for product in self.position_limits.keys()}
         self.p_and_l = {product: 0.0 for product in self.position_limits.keys()}
         self.peak_p_and_l = 0.0
+        self._total_pnl = 0.0  # Running sum of p_and_l, kept in step with it
         self.drawdown_threshold = 0.05  # 5% drawdown triggers caution
         self.loss_unwind_threshold = 0.1  # 10% position loss triggers unwind
 
-    def get_mid(self, product: str, state: TradingState) -> float:
-        if product not in state.order_depths:
-            return None
-        bids = state.order_depths[product].buy_orders
-        asks = state.order_depths[product].sell_orders
-        if bids and asks:
-            return (max(bids.keys()) + min(asks.keys())) / 2
-        return None
-
-    def update_price_history(self, state: TradingState):
+    def update_price_history(self, mids: Dict[str, float]):
         for product in self.position_limits:
-            mid = self.get_mid(product, state)
+            mid = mids.get(product)
             if mid:
-                self.price_history[product].append(mid)
-                if len(self.price_history[product]) > self.max_history:
-                    self.price_history[product].pop(0)
+                last_mid = self._last_mid[product]
+                if last_mid is not None:
+                    alpha = self.volatility_alpha
+                    self._vol_ewma[product] = alpha * abs(mid - last_mid) + (1 - alpha) * self._vol_ewma[product]
+                self._last_mid[product] = mid
 
     def get_volatility(self, product: str) -> float:
-        prices = self.price_history[product]
-        if len(prices) < 2:
-            return 1.0
-        diffs = [abs(prices[i] - prices[i-1]) for i in range(1, len(prices))]
-        return sum(diffs) / len(diffs) if diffs else 1.0
-
-    def within_limits(self, state: TradingState, product: str, qty: int) -> bool:
-        current_position = state.position.get(product, 0)
-        new_position = current_position + qty
-        return abs(new_position) <= self.position_limits[product]
+        return self._vol_ewma[product]
 
     def update_p_and_l(self, state: TradingState):
-        total_pnl = 0.0
         for product in self.position_limits:
             if product in state.market_trades:
                 for trade in state.market_trades[product]:
-                    if product not in self.p_and_l:
-                        self.p_and_l[product] = 0.0
-                    self.p_and_l[product] += trade.quantity * trade.price
-            total_pnl += self.p_and_l.get(product, 0.0)
-        self.peak_p_and_l = max(self.peak_p_and_l, total_pnl)
+                    delta = trade.quantity * trade.price
+                    self.p_and_l[product] += delta
+                    self._total_pnl += delta
+        self.peak_p_and_l = max(self.peak_p_and_l, self._total_pnl)
 
-    def unwind_position(self, state: TradingState, product: str, orders: Dict[str, List[Order]]):
+    def unwind_position(self, state: TradingState, product: str, orders: Dict[str, List[Order]], tops, room):
         current_position = state.position.get(product, 0)
         if current_position == 0:
             return
-        order_depth = state.order_depths[product]
-        mid_price = self.get_mid(product, state)
+        best_bid, best_bid_volume, best_ask, best_ask_volume = tops[product]
+        mid_price = (best_bid + best_ask) / 2
         position_value = current_position * mid_price
         position_pnl = position_value - self.p_and_l.get(product, 0.0)
         # Unwind if position loss > 10%
         if abs(position_pnl / self.p_and_l.get(product, 1e-6)) > self.loss_unwind_threshold:
             if current_position > 0:
-                best_bid = max(order_depth.buy_orders.keys())
-                volume = min(order_depth.buy_orders[best_bid], current_position)
-                if volume > 0 and self.within_limits(state, product, -volume):
-                    orders[product] = orders.get(product, []) + [Order(product, best_bid, -volume)]
+                volume = min(best_bid_volume, current_position)
+                if volume > 0 and volume <= room[product][1]:
+                    orders.setdefault(product, []).append(Order(product, best_bid, -volume))
             elif current_position < 0:
-                best_ask = min(order_depth.sell_orders.keys())
-                volume = min(order_depth.sell_orders[best_ask], -current_position)
-                if volume > 0 and self.within_limits(state, product, volume):
-                    orders[product] = orders.get(product, []) + [Order(product, best_ask, volume)]
+                volume = min(best_ask_volume, -current_position)
+                if volume > 0 and volume <= room[product][0]:
+                    orders.setdefault(product, []).append(Order(product, best_ask, volume))
 
     def get_volume_scale(self, spread: float, buffer: float) -> float:
         # Scale volume with spread size
@@ -84,20 +109,36 @@ class Trader:
 
     def run(self, state: TradingState) -> tuple[Dict[str, List[Order]], int, str]:
         orders: Dict[str, List[Order]] = {}
-        self.update_price_history(state)
+
+        # Top of book, mid and position per product, read once and shared by every consumer below
+        tops = {}
+        for product in self.position_limits:
+            if product in state.order_depths:
+                top = _top_of_book(state.order_depths[product])
+                if top is not None:
+                    tops[product] = top
+        mids = {product: (top[0] + top[2]) / 2 for product, top in tops.items()}
+        positions = {product: state.position.get(product, 0) for product in self.position_limits}
+        position_limits = self.position_limits
+        # (buy room, sell room) left under each limit, so a limit check is one compare
+        room = {product: (limit - positions[product], limit + positions[product])
+                for product, limit in position_limits.items()}
+        comp1 = self.basket1_composition
+        comp2 = self.basket2_composition
+
+        self.update_price_history(mids)
         self.update_p_and_l(state)
 
         # Check drawdown for cautious trading
-        total_pnl = sum(self.p_and_l.values())
-        drawdown = (self.peak_p_and_l - total_pnl) / (self.peak_p_and_l + 1e-6)
+        drawdown = (self.peak_p_and_l - self._total_pnl) / (self.peak_p_and_l + 1e-6)
         volume_multiplier = 0.5 if drawdown > self.drawdown_threshold else 1.0
 
         # Get mid prices
-        croissant_mid = self.get_mid("CROISSANTS", state)
-        jam_mid = self.get_mid("JAMS", state)
-        djembe_mid = self.get_mid("DJEMBES", state)
-        basket1_mid = self.get_mid("PICNIC_BASKET1", state)
-        basket2_mid = self.get_mid("PICNIC_BASKET2", state)
+        croissant_mid = mids.get("CROISSANTS")
+        jam_mid = mids.get("JAMS")
+        djembe_mid = mids.get("DJEMBES")
+        basket1_mid = mids.get("PICNIC_BASKET1")
+        basket2_mid = mids.get("PICNIC_BASKET2")
 
         # Adaptive profit buffer
         basket1_vol = self.get_volatility("PICNIC_BASKET1")
@@ -106,80 +147,72 @@ class Trader:
         profit_buffer2 = min(self.base_profit_buffer + basket2_vol * 0.75, 4.0)
 
         # PICNIC_BASKET1 Arbitrage
-        if all([croissant_mid, jam_mid, djembe_mid, basket1_mid]):
-            basket1_value = (self.basket1_composition["CROISSANTS"] * croissant_mid +
-                             self.basket1_composition["JAMS"] * jam_mid +
-                             self.basket1_composition["DJEMBES"] * djembe_mid)
-
-            spread = basket1_mid - basket1_value
+        if croissant_mid is not None and jam_mid is not None and djembe_mid is not None and basket1_mid is not None:
+            decision, spread = _basket_decision(basket1_mid, croissant_mid, jam_mid, djembe_mid,
+                                                comp1["CROISSANTS"], comp1["JAMS"], comp1["DJEMBES"], profit_buffer1)
             volume_scale = self.get_volume_scale(spread, profit_buffer1) * volume_multiplier
-            if spread > profit_buffer1:  # Sell basket
-                best_bid = max(state.order_depths["PICNIC_BASKET1"].buy_orders.keys())
-                max_volume = min(state.order_depths["PICNIC_BASKET1"].buy_orders[best_bid],
-                                 self.position_limits["PICNIC_BASKET1"] - abs(state.position.get("PICNIC_BASKET1", 0)))
+            if decision == UNWIND:
+                self.unwind_position(state, "PICNIC_BASKET1", orders, tops, room)
+                for product, _ in self._b1_items:
+                    self.unwind_position(state, product, orders, tops, room)
+            elif decision == SELL_BASKET:  # Sell basket
+                best_bid, best_bid_volume, _, _ = tops["PICNIC_BASKET1"]
+                max_volume = min(best_bid_volume, position_limits["PICNIC_BASKET1"] - abs(positions["PICNIC_BASKET1"]))
                 volume = int(max_volume * volume_scale)
-                if volume > 0 and self.within_limits(state, "PICNIC_BASKET1", -volume):
+                if volume > 0 and volume <= room["PICNIC_BASKET1"][1]:
                     orders["PICNIC_BASKET1"] = [Order("PICNIC_BASKET1", best_bid, -volume)]
-                    for product, qty in self.basket1_composition.items():
-                        if self.within_limits(state, product, volume * qty):
-                            best_ask = min(state.order_depths[product].sell_orders.keys())
-                            avail_volume = min(state.order_depths[product].sell_orders[best_ask], volume * qty)
+                    for product, qty in self._b1_items:
+                        if volume * qty <= room[product][0]:
+                            _, _, best_ask, best_ask_volume = tops[product]
+                            avail_volume = min(best_ask_volume, volume * qty)
                             if avail_volume > 0:
-                                orders[product] = orders.get(product, []) + [Order(product, best_ask, avail_volume)]
-            elif spread < -profit_buffer1:  # Buy basket
-                best_ask = min(state.order_depths["PICNIC_BASKET1"].sell_orders.keys())
-                max_volume = min(state.order_depths["PICNIC_BASKET1"].sell_orders[best_ask],
-                                 self.position_limits["PICNIC_BASKET1"] - abs(state.position.get("PICNIC_BASKET1", 0)))
+                                orders.setdefault(product, []).append(Order(product, best_ask, avail_volume))
+            elif decision == BUY_BASKET:  # Buy basket
+                _, _, best_ask, best_ask_volume = tops["PICNIC_BASKET1"]
+                max_volume = min(best_ask_volume, position_limits["PICNIC_BASKET1"] - abs(positions["PICNIC_BASKET1"]))
                 volume = int(max_volume * volume_scale)
-                if volume > 0 and self.within_limits(state, "PICNIC_BASKET1", volume):
+                if volume > 0 and volume <= room["PICNIC_BASKET1"][0]:
                     orders["PICNIC_BASKET1"] = [Order("PICNIC_BASKET1", best_ask, volume)]
-                    for product, qty in self.basket1_composition.items():
-                        if self.within_limits(state, product, -volume * qty):
-                            best_bid = max(state.order_depths[product].buy_orders.keys())
-                            avail_volume = min(state.order_depths[product].buy_orders[best_bid], volume * qty)
+                    for product, qty in self._b1_items:
+                        if volume * qty <= room[product][1]:
+                            best_bid, best_bid_volume, _, _ = tops[product]
+                            avail_volume = min(best_bid_volume, volume * qty)
                             if avail_volume > 0:
-                                orders[product] = orders.get(product, []) + [Order(product, best_bid, -avail_volume)]
-            elif abs(spread) < profit_buffer1 / 2:
-                self.unwind_position(state, "PICNIC_BASKET1", orders)
-                for product in self.basket1_composition:
-                    self.unwind_position(state, product, orders)
+                                orders.setdefault(product, []).append(Order(product, best_bid, -avail_volume))
 
         # PICNIC_BASKET2 Arbitrage
-        if all([croissant_mid, jam_mid, basket2_mid]):
-            basket2_value = (self.basket2_composition["CROISSANTS"] * croissant_mid +
-                             self.basket2_composition["JAMS"] * jam_mid)
-
-            spread = basket2_mid - basket2_value
+        if croissant_mid is not None and jam_mid is not None and basket2_mid is not None:
+            # Basket 2 holds no djembes
+            decision, spread = _basket_decision(basket2_mid, croissant_mid, jam_mid, 0.0,
+                                                comp2["CROISSANTS"], comp2["JAMS"], 0, profit_buffer2)
             volume_scale = self.get_volume_scale(spread, profit_buffer2) * volume_multiplier
-            if spread > profit_buffer2:  # Sell basket
-                best_bid = max(state.order_depths["PICNIC_BASKET2"].buy_orders.keys())
-                max_volume = min(state.order_depths["PICNIC_BASKET2"].buy_orders[best_bid],
-                                 self.position_limits["PICNIC_BASKET2"] - abs(state.position.get("PICNIC_BASKET2", 0)))
+            if decision == UNWIND:
+                self.unwind_position(state, "PICNIC_BASKET2", orders, tops, room)
+                for product, _ in self._b2_items:
+                    self.unwind_position(state, product, orders, tops, room)
+            elif decision == SELL_BASKET:  # Sell basket
+                best_bid, best_bid_volume, _, _ = tops["PICNIC_BASKET2"]
+                max_volume = min(best_bid_volume, position_limits["PICNIC_BASKET2"] - abs(positions["PICNIC_BASKET2"]))
                 volume = int(max_volume * volume_scale)
-                if volume > 0 and self.within_limits(state, "PICNIC_BASKET2", -volume):
+                if volume > 0 and volume <= room["PICNIC_BASKET2"][1]:
                     orders["PICNIC_BASKET2"] = [Order("PICNIC_BASKET2", best_bid, -volume)]
-                    for product, qty in self.basket2_composition.items():
-                        if self.within_limits(state, product, volume * qty):
-                            best_ask = min(state.order_depths[product].sell_orders.keys())
-                            avail_volume = min(state.order_depths[product].sell_orders[best_ask], volume * qty)
+                    for product, qty in self._b2_items:
+                        if volume * qty <= room[product][0]:
+                            _, _, best_ask, best_ask_volume = tops[product]
+                            avail_volume = min(best_ask_volume, volume * qty)
                             if avail_volume > 0:
-                                orders[product] = orders.get(product, []) + [Order(product, best_ask, avail_volume)]
-            elif spread < -profit_buffer2:  # Buy basket
-                best_ask = min(state.order_depths["PICNIC_BASKET2"].sell_orders.keys())
-                max_volume = min(state.order_depths["PICNIC_BASKET2"].sell_orders[best_ask],
-                                 self.position_limits["PICNIC_BASKET2"] - abs(state.position.get("PICNIC_BASKET2", 0)))
+                                orders.setdefault(product, []).append(Order(product, best_ask, avail_volume))
+            elif decision == BUY_BASKET:  # Buy basket
+                _, _, best_ask, best_ask_volume = tops["PICNIC_BASKET2"]
+                max_volume = min(best_ask_volume, position_limits["PICNIC_BASKET2"] - abs(positions["PICNIC_BASKET2"]))
                 volume = int(max_volume * volume_scale)
-                if volume > 0 and self.within_limits(state, "PICNIC_BASKET2", volume):
+                if volume > 0 and volume <= room["PICNIC_BASKET2"][0]:
                     orders["PICNIC_BASKET2"] = [Order("PICNIC_BASKET2", best_ask, volume)]
-                    for product, qty in self.basket2_composition.items():
-                        if self.within_limits(state, product, -volume * qty):
-                            best_bid = max(state.order_depths[product].buy_orders.keys())
-                            avail_volume = min(state.order_depths[product].buy_orders[best_bid], volume * qty)
+                    for product, qty in self._b2_items:
+                        if volume * qty <= room[product][1]:
+                            best_bid, best_bid_volume, _, _ = tops[product]
+                            avail_volume = min(best_bid_volume, volume * qty)
                             if avail_volume > 0:
-                                orders[product] = orders.get(product, []) + [Order(product, best_bid, -avail_volume)]
-            elif abs(spread) < profit_buffer2 / 2:
-                self.unwind_position(state, "PICNIC_BASKET2", orders)
-                for product in self.basket2_composition:
-                    self.unwind_position(state, product, orders)
+                                orders.setdefault(product, []).append(Order(product, best_bid, -avail_volume))
 
-        return orders, 0, "OPTIMIZED_ARBITRAGE"
\ No newline at end of file
+        return orders, 0, "OPTIMIZED_ARBITRAGE"
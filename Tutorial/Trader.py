@@ -1,6 +1,8 @@
 from datamodel import OrderDepth, TradingState, Order
-from typing import List
-import json
+from typing import Dict, List
+
+# Trade logging is for local runs only
+DEBUG = False
 
 class Trader:
     # Define position limits per product; adjust based on challenge 'Rounds' data
@@ -10,6 +12,24 @@ class Trader:
     }
     DEFAULT_LIMIT = 20  # Fallback if product not specified
     ALPHA = 1 / 3  # EMA smoothing factor, equivalent to N=5
+    DECAY = 1 - ALPHA  # Weight kept by the previous EMA, fixed with ALPHA
+
+    def __init__(self):
+        # EMA per product, kept on the instance between ticks
+        self._ema: Dict[str, float] = {}
+        # traderData returned last tick; the EMAs are only re-parsed when the string differs
+        self._trader_data = None
+
+    @staticmethod
+    def parse_trader_data(trader_data: str) -> Dict[str, float]:
+        """Read the "product,ema;product,ema" string written by run()."""
+        if not trader_data:
+            return {}
+        emas = {}
+        for entry in trader_data.split(";"):
+            product, ema = entry.split(",")
+            emas[product] = float(ema)
+        return emas
 
     def run(self, state: TradingState):
         """
@@ -21,31 +41,36 @@ class Trader:
         Returns:
             tuple: (result: dict of orders, conversions: int, traderData: str)
         """
-        # Load previous traderData
-        trader_data = json.loads(state.traderData) if state.traderData else {}
+        # Load previous traderData, unless it is the state this instance already holds
+        if state.traderData != self._trader_data:
+            self._ema = self.parse_trader_data(state.traderData)
+        emas = self._ema
         result = {}
 
-        for product in state.order_depths:
-            order_depth: OrderDepth = state.order_depths[product]
-            orders: List[Order] = []
+        # Snapshot of every two-sided book as (price, volume) at the top; products without buy or sell orders are skipped
+        products, bid_tops, ask_tops = [], [], []
+        for product, order_depth in state.order_depths.items():
+            bids = order_depth.buy_orders
+            asks = order_depth.sell_orders
+            if bids and asks:
+                best_bid = max(bids)
+                best_ask = min(asks)
+                products.append(product)
+                bid_tops.append((best_bid, bids[best_bid]))
+                ask_tops.append((best_ask, asks[best_ask]))
+        mids = [(bid_top[0] + ask_top[0]) / 2 for bid_top, ask_top in zip(bid_tops, ask_tops)]
 
-            # Skip if no buy or sell orders available
-            if not (order_depth.buy_orders and order_depth.sell_orders):
-                continue
+        # Update EMAs - the recursive form needs only the previous value, so it stays O(1) per product
+        acceptable_prices = self.update_emas(emas, products, mids)
 
-            # Calculate mid-price
-            best_bid = max(order_depth.buy_orders.keys())
-            best_ask = min(order_depth.sell_orders.keys())
-            mid_price = (best_bid + best_ask) / 2
-
-            # Update EMA
-            if product not in trader_data:
-                trader_data[product] = {"ema": mid_price}
-            else:
-                old_ema = trader_data[product]["ema"]
-                new_ema = self.ALPHA * mid_price + (1 - self.ALPHA) * old_ema
-                trader_data[product]["ema"] = new_ema
-            acceptable_price = trader_data[product]["ema"]
+        for i, product in enumerate(products):
+            mid_price = mids[i]
+            acceptable_price = acceptable_prices[i]
+            if mid_price == acceptable_price:
+                continue  # No signal, nothing to trade
+            best_bid, best_bid_amount = bid_tops[i]  # Volume positive
+            best_ask, best_ask_amount = ask_tops[i]  # Volume negative
+            orders: List[Order] = []
 
             # Position and limits
             position_limit = self.POSITION_LIMITS.get(product, self.DEFAULT_LIMIT)
@@ -55,24 +80,35 @@ class Trader:
 
             # Trading decisions
             if mid_price < acceptable_price and max_buy > 0:
-                best_ask_amount = order_depth.sell_orders[best_ask]  # Negative
                 buy_amount = min(max_buy, -best_ask_amount)  # Convert to positive
                 if buy_amount > 0:
                     orders.append(Order(product, best_ask, buy_amount))
-                    print(f"BUY {product} {buy_amount}x at {best_ask}")
+                    if DEBUG:
+                        print(f"BUY {product} {buy_amount}x at {best_ask}")
 
             elif mid_price > acceptable_price and max_sell > 0:
-                best_bid_amount = order_depth.buy_orders[best_bid]  # Positive
                 sell_amount = min(max_sell, best_bid_amount)
                 if sell_amount > 0:
                     orders.append(Order(product, best_bid, -sell_amount))
-                    print(f"SELL {product} {sell_amount}x at {best_bid}")
+                    if DEBUG:
+                        print(f"SELL {product} {sell_amount}x at {best_bid}")
 
             if orders:
                 result[product] = orders
 
-        # Serialize updated traderData
-        traderData = json.dumps(trader_data)
+        # Serialize updated traderData as "product,ema" pairs; float repr round-trips exactly
+        traderData = ";".join(f"{product},{ema!r}" for product, ema in emas.items())
+        self._trader_data = traderData
         conversions = 0  # No conversions implemented yet
 
         return result, conversions, traderData
+
+    def update_emas(self, emas: Dict[str, float], products: List[str], mids: List[float]) -> List[float]:
+        """Fold this tick's mids into the EMAs in place and return the new EMA per product.
+        A product seen for the first time starts its EMA at the mid."""
+        new_emas = []
+        for product, mid_price in zip(products, mids):
+            ema = emas.get(product)
+            new_emas.append(mid_price if ema is None else self.ALPHA * mid_price + self.DECAY * ema)
+        emas.update(zip(products, new_emas))
+        return new_emas